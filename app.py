@@ -1,33 +1,71 @@
+import argparse
 import datetime as dt
-import inspect
-import json
 import os
-import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextvars import copy_context
+from types import SimpleNamespace
 from typing import Optional
 
 from dotenv import load_dotenv
-import gradio as gr
-from duckduckgo_search import DDGS
-from openai import AzureOpenAI
 from pydantic import BaseModel
 
 
-from src.gt_tools import gt_tools, gt_tools_dict
+from src.agent_runtime import ToolArgumentError, compile_agents, get_runtime, pin_text
+from src.handoff import handoff_context
+from src.history import gtHistoryManager, message_field
+from src.llm_retry import gtRetryPolicy
 from src.program_functions import gtProgramManager
-from src.calendar_functions import gtCalendarManager
-from src.db_functions import query_university_db, get_db_schema
-
-calendar_manager = gtCalendarManager()
+from src.calendar_functions import current_calendar, gtCalendarManager, gtSessionCalendarManager
+from src.db_functions import query_university_db, get_db_schema, get_schema_version
+from src.deadline import DeadlineExceeded, current_deadline, gtDeadline
+from src.schedule_functions import check_schedule_conflicts
+from src.sessions import gtSession, gtSessionStore
+from src.tracing import payload_chars, tracer
+from src.triage_router import triage_router
+from src.turn_guard import FALLBACK_ANSWER, FINAL_ANSWER_NOTE, gtTurnGuard, loop_metrics
+from src.recommendation_functions import recommend_course_bundles
+from src.usage_metrics import usage_metrics
+
+# calendar tools use the calendar manager of the session that is being answered
+calendar_manager = gtSessionCalendarManager()
 program_manager = gtProgramManager()
 
 
 load_dotenv()
 
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"), 
-    api_version="2024-12-01-preview", 
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-    )
+# created on the first model call (or replaced, e.g. by benchmarks), so importing app needs neither openai nor credentials
+client = None
+
+def get_client():
+    global client
+    if client is None:
+        from openai import AzureOpenAI
+
+        client = AzureOpenAI(
+            api_key=os.getenv("AZURE_OPENAI_API_KEY"), 
+            api_version="2024-12-01-preview", 
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+            max_retries=0,  # retries are done by retry_policy, which knows the turn deadline
+            )
+    return client
+
+# per-call timeout and retries of model calls, and the time a whole turn (model calls and tools) may take
+retry_policy = gtRetryPolicy(
+    call_timeout=float(os.getenv("LLM_CALL_TIMEOUT", "30")),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+)
+TURN_DEADLINE_SECONDS = float(os.getenv("TURN_DEADLINE_SECONDS", "120"))
+DEADLINE_REPLY = "Sorry, answering this took too long. Please try again, or ask a narrower question."
+# model calls and handoffs one turn may use before it has to answer
+TURN_MAX_MODEL_CALLS = int(os.getenv("TURN_MAX_MODEL_CALLS", "8"))
+TURN_MAX_HANDOFFS = int(os.getenv("TURN_MAX_HANDOFFS", "3"))
+
+# bounds the history sent on every model call (and kept in memory by the chat UI)
+history_manager = gtHistoryManager(
+    token_budget=int(os.getenv("HISTORY_TOKEN_BUDGET", "8000")),
+    keep_recent_turns=int(os.getenv("HISTORY_KEEP_RECENT_TURNS", "2")),
+)
 
 class Agent(BaseModel):
     name: str = "Agent"
@@ -40,118 +78,334 @@ class Response(BaseModel):
     agent: Optional[Agent]
     messages: list
 
-def function_to_schema(func) -> dict:
-    type_map = {
-        str: "string",
-        int: "integer",
-        float: "number",
-        bool: "boolean",
-        list: "array",
-        dict: "object",
-        type(None): "null",
-    }
-
-    try: 
-        signature = inspect.signature(func)
-    except Exception as e:
-        raise ValueError(f"Failed to get signature for function {func.__name__}: {str(e)}")
-    
-    parameters = {}
-    for param in signature.parameters.values():
-        try: 
-            param_type = type_map.get(param.annotation, "string")
-        except Exception as e:
-            raise KeyError(
-                f"Unknown type annotation {param.annotation} for parameter {param.name}: {str(e)}"
-            )
-        parameters[param.name] = {"type": param_type}
-
-    required = [
-        param.name
-        for param in signature.parameters.values()
-        if param.default == inspect._empty
-    ]
-
-    return {
-        "type": "function",
-        "function": {
-            "name": func.__name__,
-            "description": (func.__doc__ or "").strip(),
-            "parameters": {
-                "type": "object",
-                "properties": parameters,
-                "required": required,
-            }
-        }
-    }
-
-def get_or_create_tool_schema(tool):
-    tool_name = tool.__name__
-
-    if tool_name in gt_tools_dict:
-        return gt_tools_dict[tool_name]
-    else:
-        new_schema = function_to_schema(tool)
-        gt_tools.append(new_schema)
-        gt_tools_dict[tool_name] = new_schema
-        return new_schema
-
-def execute_tool_call(tool_call, tool_map, agent_name):
-
-    name = tool_call.function.name
-    args = json.loads(tool_call.function.arguments)
+def execute_tool_call(tool_call, runtime, turn_id=None, deadline=None):
+    if deadline is not None and deadline.expired():
+        return f"Error: {tool_call.function.name} was not run because the turn deadline passed."
 
-    return tool_map[name](**args)
+    # database queries and web searches read the deadline to bound their own work
+    token = current_deadline.set(deadline)
+    try:
+        return _execute_tool_call(tool_call, runtime, turn_id)
+    finally:
+        current_deadline.reset(token)
+
+def _execute_tool_call(tool_call, runtime, turn_id):
+    with tracer.span("tool_call", turn_id, name=tool_call.function.name, agent=runtime.name,
+                     args_chars=len(tool_call.function.arguments or "")) as span:
+        try:
+            tool, args = runtime.parse_arguments(tool_call)
+        except ToolArgumentError as e:
+            span["invalid_arguments"] = True
+            # answered locally so the model can correct the call on its next step
+            return f"Error: invalid call to {tool_call.function.name}: {e}"
+
+        result = tool(**args)
+        if not isinstance(result, Agent):
+            span["result_chars"] = len(str(result))
+        return result
+
+# shared by all turns so the total number of tool threads stays bounded
+TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "8"))
+tool_executor = ThreadPoolExecutor(max_workers=TOOL_MAX_WORKERS, thread_name_prefix="tool")
+
+def execute_tool_calls(tool_calls, runtime, turn_id=None, deadline=None):
+    """
+    Runs the tool calls of one assistant message concurrently and returns their results in call order.
+    Calls to methods of the same object (e.g. setup_credentials then create_event) still run one after another.
+    Calls still running when the deadline passes are answered with an error instead of waited for.
+    """
+    if len(tool_calls) == 1:
+        return [execute_tool_call(tool_calls[0], runtime, turn_id, deadline)]
+
+    groups = {}
+    for i, tool_call in enumerate(tool_calls):
+        owner = getattr(runtime.tool_map.get(tool_call.function.name), "__self__", None)
+        key = id(owner) if owner is not None else ("call", i)
+        groups.setdefault(key, []).append(i)
+
+    def run_group(indexes):
+        return [(i, execute_tool_call(tool_calls[i], runtime, turn_id, deadline)) for i in indexes]
+
+    # each group runs in a copy of the caller's context so per-session values reach the tool threads
+    futures = [(tool_executor.submit(copy_context().run, run_group, indexes), indexes) for indexes in groups.values()]
+    results = [None] * len(tool_calls)
+    for future, indexes in futures:
+        try:
+            group_results = future.result(timeout=None if deadline is None else deadline.remaining())
+        except FutureTimeoutError:
+            group_results = [
+                (i, f"Error: {tool_calls[i].function.name} did not finish before the turn deadline.") for i in indexes
+            ]
+        for i, result in group_results:
+            results[i] = result
+    return results
 
 def run_full_turn(agent, messages):
+    for event in run_turn(agent, messages, stream=False):
+        if event["type"] == "done":
+            return event["response"]
 
-    current_agent = agent
+def run_turn(agent, messages, stream):
+    """
+    The agent loop shared by run_full_turn and run_full_turn_stream; yields the events listed in run_full_turn_stream.
+    With stream=False the model answers in one piece and the text comes as a single event per call.
+    """
     messages = messages.copy()
     num_init_messages = len(messages)
+    turn_id = tracer.new_turn_id()
+    deadline = gtDeadline(TURN_DEADLINE_SECONDS)
+
+    with tracer.span("turn", turn_id, name=agent.name, streamed=stream) as turn_span:
+        current_agent, scope = route_turn(agent, messages, turn_id)
+        guard = gtTurnGuard(agent.name, max_model_calls=TURN_MAX_MODEL_CALLS, max_handoffs=TURN_MAX_HANDOFFS)
+        if current_agent is not agent:
+            guard.routed_to(current_agent.name)
+            yield {"type": "handoff", "agent": current_agent.name}
+
+        while True:
+
+            runtime = get_runtime(current_agent)
+            request_messages = runtime.request_messages(scoped_messages(messages, scope))
+            final = guard.final_call()
+            if final:
+                request_messages.append({"role": "system", "content": FINAL_ANSWER_NOTE})
+
+            content_parts = []
+            try:
+                call = stream_model_call if stream else model_call
+                content, tool_calls = yield from call(
+                    current_agent, runtime, request_messages, final, guard, content_parts, turn_id, deadline
+                )
+            except DeadlineExceeded:
+                turn_span["deadline_exceeded"] = True
+                # whatever was streamed so far is kept; tool calls that were cut off are dropped
+                notice = ("\n\n" if content_parts else "") + DEADLINE_REPLY
+                yield {"type": "text", "agent": current_agent.name, "delta": notice}
+                messages.append({"role": "assistant", "content": "".join(content_parts) + notice})
+                break
+
+            if final and (tool_calls or not content):
+                # a final answer must not leave tool calls without results in the history
+                if not content:
+                    content = final_answer(content)["content"]
+                    yield {"type": "text", "agent": current_agent.name, "delta": content}
+                tool_calls = []
+            message = {"role": "assistant", "content": content}
+            if tool_calls:
+                message["tool_calls"] = [
+                    {"id": tc.id, "type": "function", "function": {"name": tc.function.name, "arguments": tc.function.arguments}}
+                    for tc in tool_calls
+                ]
+            messages.append(message)
+
+            tracer.debug("assistant message", message)
+
+            if content:
+                print(f"{current_agent.color}{current_agent.name}: {content}\033[0m")
+
+            if not tool_calls:
+                break
+
+            for tool_call in tool_calls:
+                yield {"type": "tool_call", "agent": current_agent.name, "name": tool_call.function.name}
+
+            results = run_tool_calls(tool_calls, runtime, guard, turn_id, deadline)
+            previous_agent = current_agent
+            current_agent = apply_tool_results(current_agent, tool_calls, results, messages, guard)
+            if current_agent is not previous_agent:
+                scope = start_scope(messages, previous_agent, current_agent)
+                tracer.event("handoff", turn_id, from_agent=previous_agent.name, to_agent=current_agent.name, routed=False)
+                yield {"type": "handoff", "agent": current_agent.name}
+
+        turn_span.update(end_agent=current_agent.name, model_calls=guard.model_calls, handoffs=guard.handoffs,
+                         forced_final=guard.force_final, new_messages=len(messages) - num_init_messages)
+
+    yield {"type": "done", "response": Response(agent = current_agent, messages = messages[num_init_messages:])}
+
+def model_call(agent, runtime, request_messages, final, guard, content_parts, turn_id, deadline):
+    """
+    One model call answered in one piece. Yields its text as one event and returns (content, tool_calls).
+    """
+    with tracer.span("llm_call", turn_id, name=agent.name, model=runtime.model,
+                     messages=len(request_messages), request_chars=payload_chars(request_messages)) as span:
+        response, span["attempts"] = retry_policy.call(
+            get_client().chat.completions.create,
+            deadline,
+            model = runtime.model,
+            messages = request_messages,
+            tools = None if final else runtime.request_tools(),
+        )
+        guard.record_model_call(final)
 
+        span.update(usage_attrs(agent, response.usage))
+        message = response.choices[0].message
+        span["response_chars"] = len(message.content or "")
+        span["tool_calls"] = len(message.tool_calls or [])
+
+    if message.content:
+        content_parts.append(message.content)
+        yield {"type": "text", "agent": agent.name, "delta": message.content}
+    tool_calls = [
+        SimpleNamespace(id=tc.id, function=SimpleNamespace(name=tc.function.name, arguments=tc.function.arguments or "{}"))
+        for tc in message.tool_calls or []
+    ]
+    return message.content, tool_calls
 
-    while True:
-
-        tool_schemas = [get_or_create_tool_schema(tool) for tool in current_agent.tools]
-        tool_map = {tool.__name__: tool for tool in current_agent.tools}
-
-        response = client.chat.completions.create(
-            model = current_agent.model,
-            messages = [{"role":"system", "content": current_agent.instructions}] + messages,
-            tools = tool_schemas or None,
+def stream_model_call(agent, runtime, request_messages, final, guard, content_parts, turn_id, deadline):
+    """
+    One streamed model call. Yields text deltas as they arrive and returns (content, tool_calls);
+    content_parts holds the text received so far if the deadline cuts the stream off.
+    """
+    tool_call_parts = {}
+    with tracer.span("llm_call", turn_id, name=agent.name, model=runtime.model, streamed=True,
+                     messages=len(request_messages), request_chars=payload_chars(request_messages)) as span:
+        call_start = time.perf_counter()
+        # retried until the first byte; a stream that fails midway is not replayed
+        stream, span["attempts"] = retry_policy.call(
+            get_client().chat.completions.create,
+            deadline,
+            model = runtime.model,
+            messages = request_messages,
+            tools = None if final else runtime.request_tools(),
+            stream = True,
+            stream_options = {"include_usage": True},
         )
+        guard.record_model_call(final)
+
+        for chunk in stream:
+            if deadline.expired():
+                getattr(stream, "close", lambda: None)()
+                retry_policy.record_deadline_hit()
+                raise DeadlineExceeded("turn deadline exceeded while streaming")
+            # with include_usage the last chunk has no choices and carries the usage of the whole call
+            if getattr(chunk, "usage", None) is not None:
+                span.update(usage_attrs(agent, chunk.usage))
+            if not chunk.choices:
+                continue
+            if "first_chunk_ms" not in span:
+                span["first_chunk_ms"] = round((time.perf_counter() - call_start) * 1000, 2)
+            delta = chunk.choices[0].delta
+            if delta.content:
+                content_parts.append(delta.content)
+                yield {"type": "text", "agent": agent.name, "delta": delta.content}
+            # tool calls arrive as fragments keyed by index; only the first carries id and name
+            for fragment in delta.tool_calls or []:
+                call = tool_call_parts.setdefault(fragment.index, {"id": None, "name": "", "arguments": ""})
+                if fragment.id:
+                    call["id"] = fragment.id
+                if fragment.function and fragment.function.name:
+                    call["name"] += fragment.function.name
+                if fragment.function and fragment.function.arguments:
+                    call["arguments"] += fragment.function.arguments
+
+        content = "".join(content_parts) or None
+        span["response_chars"] = len(content or "")
+        span["tool_calls"] = len(tool_call_parts)
+
+    tool_calls = [
+        SimpleNamespace(id=call["id"], function=SimpleNamespace(name=call["name"], arguments=call["arguments"] or "{}"))
+        for _, call in sorted(tool_call_parts.items())
+    ]
+    return content, tool_calls
 
-        message = response.choices[0].message
-        messages.append(message)
+def final_answer(content):
+    """
+    The assistant message kept when a forced final call still asked for tools or returned no text.
+    """
+    if not content:
+        loop_metrics.count("fallback_answers")
+    return {"role": "assistant", "content": content or FALLBACK_ANSWER}
 
-        print(message)
+def run_tool_calls(tool_calls, runtime, guard, turn_id=None, deadline=None):
+    """
+    Runs the tool calls of one assistant message, except calls already made with the same arguments in this turn.
+    """
+    duplicates = guard.duplicate_calls(tool_calls)
+    to_run = [tool_call for i, tool_call in enumerate(tool_calls) if i not in duplicates]
+    ran = iter(execute_tool_calls(to_run, runtime, turn_id, deadline) if to_run else [])
+    return [
+        f"Error: {tool_call.function.name} was already called with these arguments in this turn; use that result."
+        if i in duplicates else next(ran)
+        for i, tool_call in enumerate(tool_calls)
+    ]
 
-        if message.content:
-            print(f"{current_agent.color}{current_agent.name}: {message.content}\033[0m")
+def usage_attrs(agent, usage):
+    """
+    Records a call's token usage in usage_metrics and returns the counts for its trace span.
+    """
+    call = usage_metrics.record(agent.name, usage)
+    return {k: v for k, v in call.items() if k != "agent"}
 
-        if not message.tool_calls:
-            break
+# set TRIAGE_ROUTER=0 to always let the triage agent's model choose
+TRIAGE_ROUTER_ENABLED = os.getenv("TRIAGE_ROUTER", "1") != "0"
 
-        for tool_call in message.tool_calls:
-            result = execute_tool_call(tool_call, tool_map, current_agent.name)
+def route_turn(agent, messages, turn_id=None):
+    """
+    Skips the triage agent's model call when the local router is confident about the user's last message.
+    Returns the agent that starts the turn and its handoff scope.
+    """
+    if not TRIAGE_ROUTER_ENABLED or agent is not triage_agent or not messages:
+        return agent, None
+    last = messages[-1]
+    if message_field(last, "role") != "user":
+        return agent, None
+    target = ROUTES.get(triage_router.route(message_field(last, "content") or ""))
+    if target is None:
+        return agent, None
+    tracer.event("handoff", turn_id, from_agent=agent.name, to_agent=target.name, routed=True)
+    return target, start_scope(messages, agent, target)
+
+def start_scope(messages, previous_agent, current_agent):
+    """
+    Called when control moves to another agent. Returns (context, start): a brief plus the recent user turns
+    replacing everything before messages[start], so the new agent doesn't receive the previous agent's tool chatter.
+    """
+    return handoff_context(messages, previous_agent.name, current_agent.name), len(messages)
+
+def scoped_messages(messages, scope):
+    if scope is None:
+        return history_manager.compact(messages)
+    context, start = scope
+    return history_manager.compact(context + messages[start:])
 
-            if type(result) == Agent:
+def apply_tool_results(current_agent, tool_calls, results, messages, guard=None):
+    """
+    Appends one tool message per call to messages and returns the agent that continues the turn.
+    """
+    # handoffs are applied in call order, so the last transfer in a message wins
+    for tool_call, result in zip(tool_calls, results):
+
+        if type(result) == Agent:
+            refused = guard.allow_handoff(current_agent.name, result.name) if guard is not None else None
+            if refused:
+                result = f"Transfer to {result.name} refused: {refused}"
+            else:
                 current_agent = result
                 result = (
                     f"Transfered to {current_agent.name}."
                 )
 
-            result_message = {
-                "role": "tool",
-                "tool_call_id": tool_call.id,
-                "content": str(result)
-            }
+        result_message = {
+            "role": "tool",
+            "tool_call_id": tool_call.id,
+            "content": str(result)
+        }
 
-            messages.append(result_message)
+        messages.append(result_message)
 
-            print(messages)
+    tracer.debug("tool results", messages[-len(tool_calls):])
 
-    return Response(agent = current_agent, messages = messages[num_init_messages:])
+    return current_agent
+
+def run_full_turn_stream(agent, messages):
+    """
+    Streaming variant of run_full_turn. Yields events while the turn runs:
+      {"type": "text", "agent": name, "delta": str}        partial assistant text
+      {"type": "tool_call", "agent": name, "name": tool}   a tool is about to run
+      {"type": "handoff", "agent": name}                   control moved to another agent
+      {"type": "done", "response": Response}               last event, same as run_full_turn's result
+    """
+    return run_turn(agent, messages, stream=True)
 
 def transfer_to_program_agent(**kwargs):
     """
@@ -184,8 +438,11 @@ def web_search(query: str, max_results: int = 5):
         list[dict] | dict: On success, a list of results (title, href, snippet). On failure, a dict with error message.
     """
     try:
+        from duckduckgo_search import DDGS
+
         results = []
-        with DDGS() as ddgs:
+        deadline = current_deadline.get()
+        with DDGS(timeout=10 if deadline is None else max(1, int(deadline.timeout(10)))) as ddgs:
             for r in ddgs.text(query, max_results=max_results):
                 results.append({
                     "title": r.get("title"),
@@ -287,10 +544,14 @@ program_agent = Agent(
     3. Things to keep in mind based on frequent tasks:
     a. course recommendation
     - when user asks about course recommendation, recommend based on the user's program and user's course history.
+    - use recommend_course_bundles with the student id and semester to get the courses the user can take and conflict-free combinations, then rank and explain them.
     - Make available options with no schedule conflict. 
+    - use check_schedule_conflicts with the offering ids to check time conflicts instead of comparing schedules yourself.
+    b. program requirements
+    - use search_program_details with the user's question to get only the relevant passages. Use get_program_details only if the passages are not enough.
     """
     ,
-    tools = [get_dateandtime, program_manager.get_program_details, transfer_to_triage_agent, transfer_to_db_agent,transfer_to_calendar_agent]
+    tools = [get_dateandtime, program_manager.search_program_details, program_manager.get_program_details, recommend_course_bundles, check_schedule_conflicts, transfer_to_triage_agent, transfer_to_db_agent,transfer_to_calendar_agent]
 )
 
 
@@ -328,8 +589,6 @@ calendar_agent = Agent(
     tools = [get_dateandtime, calendar_manager.setup_credentials, calendar_manager.create_event, calendar_manager.delete_event, calendar_manager.get_events, transfer_to_triage_agent, transfer_to_db_agent]
 )
 
-db_schema = get_db_schema()
-
 db_agent = Agent(
     name = "Database Agent",
     color = "\033[92m",  # 초록색
@@ -362,18 +621,27 @@ db_agent = Agent(
     1. Important rules:
     - Be concise.
     - You should only use web_search tool if you cannot find the information using query_university_db.
-    - Checking time conflicts for course recommendation is your job do not transfer to other agents for this.
+    - Checking time conflicts for course recommendation is your job do not transfer to other agents for this. Use check_schedule_conflicts with the offering ids.
     2. Role:
     - You are the database agent. Your job is to use the query_university_db tool to get the user's information and help other agents do their jobs based on these information.
     - Try using query_university_db first and use web_search tool if you cannot find the information, and be sure to inform the user that you used searched the web when you use web_search tool.
     - You can transfer to triage_agent, program_agent, calendar_agent after retrieving the user's information.
     - Try not to use query_university_db if you already have the information from the conversation history. (since it uses too much tokens.)
+    - The database schema is listed at the end of these instructions. Call get_db_schema only if you need sample rows.
     - Transfer back to the agent that called you after retrieving the required information.
     """,
-    tools = [get_dateandtime, query_university_db, get_db_schema, web_search, transfer_to_triage_agent, transfer_to_program_agent, transfer_to_calendar_agent]
+    tools = [get_dateandtime, query_university_db, get_db_schema, check_schedule_conflicts, web_search, transfer_to_triage_agent, transfer_to_program_agent, transfer_to_calendar_agent]
 )
 
-async def main():
+# agents the local triage router can hand a turn to directly
+ROUTES = {"program": program_agent, "calendar": calendar_agent, "db": db_agent}
+
+# freeze schemas, tool maps and system messages once instead of on every model call
+compile_agents(triage_agent, program_agent, calendar_agent, db_agent)
+# the schema is part of db_agent's fixed prompt prefix, so it's served from the prompt cache; re-read when set_db changes it
+pin_text(db_agent, lambda: "Database schema:\n" + get_db_schema(compact=True), version=get_schema_version)
+
+def run_cli():
     agent = triage_agent
     messages = []
 
@@ -388,8 +656,6 @@ async def main():
         messages.extend(response.messages)
 
 
-chat_history = []
-
 # def chat(user_message, history):
 #     global chat_history
 #     if user_message.lower() in ["quit", "exit", "bye"]:
@@ -400,25 +666,97 @@ chat_history = []
 #     chat_history.extend(response.messages)
 #     return response.messages[-1].content
 
-def chat(user_message, history):
-    global chat_history
-    if user_message.lower() in ["quit", "exit", "bye"]:
-        sys.exit(0)
+def new_session(session_id):
+    return gtSession(session_id, triage_agent, context_values=[(current_calendar, gtCalendarManager())])
 
-    # append the user message to chat history
-    chat_history.append({"role": "user", "content": user_message})
+# one history, current agent and calendar login per browser session
+session_store = gtSessionStore(
+    new_session,
+    idle_timeout=int(os.getenv("SESSION_IDLE_TIMEOUT", "1800")),
+    max_sessions=int(os.getenv("SESSION_MAX_SESSIONS", "500")),
+    max_total_tokens=int(os.getenv("SESSION_MAX_TOTAL_TOKENS", "2000000")),
+)
 
-    # run the agent loop
-    response = run_full_turn(triage_agent, chat_history)
-    chat_history.extend(response.messages)
+def chat(user_message, history, request=None):
+    session_id = getattr(request, "session_hash", None) or "default"
+    if user_message.lower() in ["quit", "exit", "bye"]:
+        session_store.end(session_id)
+        yield "Session ended. Send a new message to start over."
+        return
+
+    session = session_store.get(session_id)
+    with session.lock:
+        # append the user message to chat history
+        session.messages.append({"role": "user", "content": user_message})
+
+        # run the agent loop, showing text as it streams and which tools are running
+        text = ""
+        status = ""
+        response = None
+        try:
+            for event in session.iterate(run_full_turn_stream(session.agent, session.messages)):
+                if event["type"] == "text":
+                    text += event["delta"]
+                    yield f"**{event['agent']}:** {text}"
+                elif event["type"] == "tool_call":
+                    text = ""
+                    status = f"_{event['agent']} is running {event['name']}..._"
+                    yield status
+                elif event["type"] == "handoff":
+                    yield f"{status}\n\n_Transferred to {event['agent']}..._"
+                elif event["type"] == "done":
+                    response = event["response"]
+        finally:
+            if response is None:
+                # the turn failed or the user left: don't keep a question without an answer
+                session.messages.pop()
+
+        session.agent = response.agent
+        session.messages.extend(response.messages)
+        session.messages[:] = history_manager.compact(session.messages)
+        session_store.resize(session)
 
     # grab the last message and its role
-    last_msg = response.messages[-1].content
+    last_msg = message_field(response.messages[-1], "content")
     agent_name = response.agent.name
 
     bot_reply = f"**{agent_name}:** {last_msg}"
 
-    return bot_reply
+    yield bot_reply
+
+# requests handled at once and requests allowed to wait; further requests are turned away with an error
+GRADIO_CONCURRENCY_LIMIT = int(os.getenv("GRADIO_CONCURRENCY_LIMIT", "16"))
+GRADIO_MAX_QUEUE_SIZE = int(os.getenv("GRADIO_MAX_QUEUE_SIZE", "64"))
+
+def build_demo():
+    import gradio as gr
+
+    # gradio passes the request (and its session hash) to parameters annotated with gr.Request
+    def respond(user_message, history, request: gr.Request):
+        yield from chat(user_message, history, request)
+
+    demo = gr.ChatInterface(fn=respond, title="GT Assistant Chatbot")
+    return demo.queue(default_concurrency_limit=GRADIO_CONCURRENCY_LIMIT, max_size=GRADIO_MAX_QUEUE_SIZE)
+
+def main(argv=None):
+    """
+    Starts the Gradio chat interface, or a terminal chat with --cli.
+    """
+    parser = argparse.ArgumentParser(description="GT student assistant.")
+    parser.add_argument("--cli", action="store_true", help="chat in the terminal instead of the browser")
+    parser.add_argument("--no-prewarm", action="store_true", help="don't index the program PDFs at startup")
+    args = parser.parse_args(argv)
+
+    if not args.no_prewarm:
+        from src.program_ingest import start_prewarm
+
+        # parse and index program PDFs in the background so the first question doesn't pay for it
+        start_prewarm()
+
+    if args.cli:
+        run_cli()
+    else:
+        build_demo().launch()
 
-# Gradio chatting interface
-gr.ChatInterface(fn=chat, title="GT Assistant Chatbot").launch()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Offline benchmark of the agent loop: triage -> database -> program agent turns against a synthetic
+university.db, with MockAzureOpenAI standing in for Azure.
+
+    python -m benchmarks.bench_agent_loop --turns 200 --concurrency 4 --latency 0.05
+    python -m benchmarks.bench_agent_loop --save baseline.json
+    python -m benchmarks.bench_agent_loop --check baseline.json   # exits 1 on a throughput regression
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+SEMESTER = "Fall 2025"
+
+
+def flow_responder(messages, tools):
+    """
+    Plays the model for triage -> db -> program turns, deciding each step from the agent's tools
+    and the tool results it has already seen since the user's last message.
+    """
+    names = {tool["function"]["name"] for tool in tools or []}
+    seen = {}
+    call_names = {}
+    student_id = "1"
+    for message in messages:
+        role = message.get("role") if isinstance(message, dict) else message.role
+        if role == "user":
+            seen = {}
+            content = message.get("content") if isinstance(message, dict) else message.content
+            student_id = "".join(ch for ch in content if ch.isdigit()) or student_id
+        elif role == "assistant":
+            for call in (message.get("tool_calls") if isinstance(message, dict) else message.tool_calls) or []:
+                call = call if isinstance(call, dict) else call.model_dump()
+                call_names[call["id"]] = call["function"]["name"]
+        elif role == "tool":
+            seen[call_names.get(message["tool_call_id"])] = message["content"]
+
+    if "recommend_course_bundles" in names:
+        if "recommend_course_bundles" not in seen:
+            return {"tool_calls": [{"name": "recommend_course_bundles", "arguments": {"student_id": int(student_id), "semester": SEMESTER}}]}
+        if "check_schedule_conflicts" not in seen:
+            return {"tool_calls": [{"name": "check_schedule_conflicts", "arguments": {"offering_ids": [301, 302, 303]}}]}
+        return {"content": f"Here are conflict-free course options for {SEMESTER}, ranked by fit with your specialization."}
+    if "query_university_db" in names:
+        if "query_university_db" not in seen:
+            return {"tool_calls": [
+                {"name": "query_university_db", "arguments": {"sql_query": f"SELECT * FROM students WHERE id = {student_id}"}},
+                {"name": "query_university_db", "arguments": {"sql_query": (
+                    "SELECT co.course_id, co.semester, t.grade FROM transcripts t "
+                    f"JOIN course_offerings co ON co.offering_id = t.offering_id WHERE t.student_id = {student_id}"
+                )}},
+            ]}
+        return {"content": "Retrieved the student's profile and transcript.", "tool_calls": [{"name": "transfer_to_program_agent"}]}
+    return {"tool_calls": [{"name": "transfer_to_db_agent"}]}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)] if values else 0.0
+
+
+def run_benchmark(app, turns, concurrency, stream, students, seed=0):
+    rng = random.Random(seed)
+    student_ids = [rng.randint(1, students) for _ in range(turns)]
+    latencies = []
+    lock = threading.Lock()
+
+    def one_turn(student_id):
+        messages = [{"role": "user", "content": f"I'm student id {student_id}. Which courses should I take in {SEMESTER}?"}]
+        start = time.perf_counter()
+        if stream:
+            response = [e for e in app.run_full_turn_stream(app.triage_agent, messages) if e["type"] == "done"][0]["response"]
+        else:
+            response = app.run_full_turn(app.triage_agent, messages)
+        elapsed = (time.perf_counter() - start) * 1000
+        if response.agent is not app.program_agent:
+            raise RuntimeError(f"turn ended with {response.agent.name} instead of the program agent")
+        with lock:
+            latencies.append(elapsed)
+
+    start = time.perf_counter()
+    # the agents print their replies; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one_turn, student_ids))
+    wall = time.perf_counter() - start
+    return wall, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the agent loop offline with a mock Azure OpenAI client.")
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds per model call")
+    parser.add_argument("--stream", action="store_true", help="use run_full_turn_stream")
+    parser.add_argument("--students", type=int, default=2000, help="students in the synthetic database")
+    parser.add_argument("--db", help="synthetic database path (default: a temporary file)")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report the Python heap peak (slower)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--save", help="write the report to this file as a baseline")
+    parser.add_argument("--check", help="compare against a saved baseline and exit 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed throughput drop for --check (default 0.2)")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="gt-bench-"), "university.db")
+    # read when the app modules are imported, so set before importing them
+    os.environ["UNIVERSITY_DB_PATH"] = db_path
+    os.environ["TRACE_FILE"] = ""
+    os.environ["TRIAGE_ROUTER"] = "0"
+    os.environ.setdefault("AZURE_OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://benchmark.invalid")
+    os.environ.setdefault("AZURE_OPENAI_DEPLOYMENT", "benchmark")
+
+    from benchmarks.synthetic_db import build_synthetic_db
+    from src.mock_client import MockAzureOpenAI
+
+    setup_start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        build_synthetic_db(db_path, students=args.students)
+    setup_seconds = time.perf_counter() - setup_start
+
+    import app
+    from src.db_functions import get_db_metrics
+    from src.tracing import tracer
+    from src.usage_metrics import get_usage_metrics
+
+    app.client = MockAzureOpenAI(flow_responder, latency=args.latency)
+
+    # one warm-up turn so imports, connections and compiled runtimes are not measured
+    run_benchmark(app, 1, 1, args.stream, args.students, seed=-1)
+    tracer.reset()
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    wall, latencies = run_benchmark(app, args.turns, args.concurrency, args.stream, args.students)
+    heap_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+    if args.tracemalloc:
+        tracemalloc.stop()
+
+    stages = tracer.get_stats()
+    usage = get_usage_metrics()
+    report = {
+        "turns": args.turns,
+        "concurrency": args.concurrency,
+        "stream": args.stream,
+        "model_latency_s": args.latency,
+        "db_setup_s": round(setup_seconds, 3),
+        "wall_s": round(wall, 3),
+        "turns_per_s": round(args.turns / wall, 2) if wall else 0.0,
+        "turn_p50_ms": round(percentile(latencies, 0.50), 2),
+        "turn_p95_ms": round(percentile(latencies, 0.95), 2),
+        "stages": {key: stages[key] for key in sorted(stages) if key.split(":")[0] in ("llm_call", "tool_call", "handoff")},
+        "model_calls_per_turn": round(stages.get("llm_call", {}).get("count", 0) / args.turns, 2),
+        "prompt_cache_hit_rate": round(usage["cache_hit_rate"], 3),
+        "db": {k: v for k, v in get_db_metrics().items() if k in ("queries", "avg_query_ms", "max_query_ms", "cache_hits", "cache_misses")},
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1),
+        "heap_peak_mb": round(heap_peak / (1024 * 1024), 2) if heap_peak is not None else None,
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['turns']} turns, concurrency {report['concurrency']}, stream={report['stream']}, model latency {args.latency}s")
+        print(f"  {report['turns_per_s']} turns/s, turn p50 {report['turn_p50_ms']} ms, p95 {report['turn_p95_ms']} ms, "
+              f"{report['model_calls_per_turn']} model calls/turn")
+        print(f"  max RSS {report['max_rss_mb']} MB" + (f", heap peak {report['heap_peak_mb']} MB" if heap_peak is not None else ""))
+        print(f"  prompt cache hit rate {report['prompt_cache_hit_rate']}, db {report['db']}")
+        print(f"  {'stage':45} {'count':>6} {'p50 ms':>9} {'p95 ms':>9}")
+        for key, stat in report["stages"].items():
+            print(f"  {key:45} {stat['count']:>6} {stat['p50_ms']:>9} {stat['p95_ms']:>9}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.check:
+        with open(args.check, encoding="utf-8") as f:
+            baseline = json.load(f)
+        floor = baseline["turns_per_s"] * (1 - args.tolerance)
+        if report["turns_per_s"] < floor:
+            print(f"REGRESSION: {report['turns_per_s']} turns/s is below {floor:.2f} (baseline {baseline['turns_per_s']})")
+            sys.exit(1)
+        print(f"ok: {report['turns_per_s']} turns/s (baseline {baseline['turns_per_s']})")
+
+
+if __name__ == "__main__":
+    main()
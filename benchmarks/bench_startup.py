@@ -0,0 +1,106 @@
+"""
+Startup benchmark: time to import app and time until it is ready to serve (agent runtimes compiled,
+database schema pinned, Gradio interface built), each measured in a fresh interpreter.
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --save startup.json
+    python -m benchmarks.bench_startup --check startup.json   # exits 1 if startup got slower
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# heavy dependencies that importing app should no longer load
+HEAVY_MODULES = ["gradio", "openai", "duckduckgo_search", "PyPDF2", "googleapiclient", "google_auth_oauthlib"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+loaded = [name for name in {heavy!r} if name in sys.modules]
+for agent in (app.triage_agent, app.program_agent, app.calendar_agent, app.db_agent):
+    app.get_runtime(agent)
+runtimes = time.perf_counter()
+ui = {ui!r}
+if ui:
+    app.build_demo()
+ready = time.perf_counter()
+print(json.dumps({{"import_s": imported - start, "runtimes_s": runtimes - imported,
+                  "ready_s": ready - start, "heavy_modules_at_import": loaded}}))
+"""
+
+
+def probe(ui=True, env=None):
+    """
+    Runs one fresh interpreter and returns its timings.
+    """
+    code = PROBE.format(heavy=HEAVY_MODULES, ui=ui)
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark how long app takes to import and to be ready to serve.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-ui", action="store_true", help="don't build the Gradio interface (ready = runtimes compiled)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--save", help="write the report to this file as a baseline")
+    parser.add_argument("--check", help="compare against a saved baseline and exit 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed slowdown for --check (default 0.3)")
+    args = parser.parse_args()
+
+    env = dict(os.environ, TRACE_FILE="")
+    env.setdefault("AZURE_OPENAI_API_KEY", "benchmark")
+    env.setdefault("AZURE_OPENAI_ENDPOINT", "https://benchmark.invalid")
+    env.setdefault("AZURE_OPENAI_DEPLOYMENT", "benchmark")
+
+    # the first run warms the OS file cache and __pycache__ and is not counted
+    probe(ui=not args.no_ui, env=env)
+    runs = [probe(ui=not args.no_ui, env=env) for _ in range(args.runs)]
+
+    report = {
+        "runs": args.runs,
+        "ui": not args.no_ui,
+        "import_s": round(statistics.median(r["import_s"] for r in runs), 3),
+        "runtimes_s": round(statistics.median(r["runtimes_s"] for r in runs), 3),
+        "ready_s": round(statistics.median(r["ready_s"] for r in runs), 3),
+        "import_max_s": round(max(r["import_s"] for r in runs), 3),
+        "heavy_modules_at_import": runs[-1]["heavy_modules_at_import"],
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['runs']} runs (median): import {report['import_s']} s (max {report['import_max_s']} s), "
+              f"runtimes {report['runtimes_s']} s, ready to serve {report['ready_s']} s"
+              + ("" if report["ui"] else " (without UI)"))
+        print(f"  heavy modules loaded by import: {', '.join(report['heavy_modules_at_import']) or 'none'}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.check:
+        with open(args.check, encoding="utf-8") as f:
+            baseline = json.load(f)
+        failed = False
+        for key in ("import_s", "ready_s"):
+            ceiling = baseline[key] * (1 + args.tolerance)
+            if report[key] > ceiling:
+                print(f"REGRESSION: {key} {report[key]} s is above {ceiling:.3f} s (baseline {baseline[key]} s)")
+                failed = True
+        if report["heavy_modules_at_import"]:
+            print(f"REGRESSION: importing app loads {', '.join(report['heavy_modules_at_import'])}")
+            failed = True
+        if failed:
+            sys.exit(1)
+        print(f"ok: import {report['import_s']} s, ready {report['ready_s']} s "
+              f"(baseline {baseline['import_s']} s, {baseline['ready_s']} s)")
+
+
+if __name__ == "__main__":
+    main()
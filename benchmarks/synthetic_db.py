@@ -0,0 +1,80 @@
+import argparse
+import os
+import random
+
+from src.set_db import bulk_load
+
+SEMESTERS = ["Fall 2024", "Spring 2025", "Fall 2025"]
+PROGRAMS = {
+    "ms-cs": ["Machine Learning", "Robotics", "Computing Systems", "Interactive Intelligence"],
+    "ms-cse": ["High Performance Computing", "Data Analytics"],
+    "ms-analytics": ["Computational Data Analytics", "Business Analytics"],
+}
+SCHEDULES = [
+    "Mon/Wed 09:30 - 10:45", "Mon/Wed 11:00 - 12:15", "Mon/Wed 12:30 - 13:45", "Mon/Wed 14:00 - 15:15",
+    "Mon/Wed 15:30 - 16:45", "Tue/Thu 09:30 - 10:45", "Tue/Thu 11:00 - 12:15", "Tue/Thu 14:00 - 15:15",
+    "Tue/Thu 15:30 - 16:45", "Tue/Thu 17:00 - 18:15", "Mon/Wed/Fri 11:00 - 11:50", "Fri 09:00 - 11:45",
+]
+DEPARTMENTS = [("CS", "Computer Science"), ("CSE", "Computational Science and Engineering"), ("ISYE", "Industrial and Systems Engineering")]
+
+
+def synthetic_tables(students=2000, courses=300, professors=150, offerings_per_semester=150, courses_per_student=5, seed=0):
+    """
+    Generates {table: rows} for a university database of the given size, with the same shape as the seed data.
+    """
+    rng = random.Random(seed)
+
+    professor_rows = [
+        (i, f"prof{i}", f"Professor {i}", rng.choice(DEPARTMENTS)[1], rng.choice(["Professor", "Associate Professor", "Assistant Professor"]), None)
+        for i in range(1, professors + 1)
+    ]
+
+    course_rows = []
+    for i in range(courses):
+        prefix, department = DEPARTMENTS[i % len(DEPARTMENTS)]
+        course_rows.append((f"{prefix}{6000 + i}", f"Topics in {department} {i}", department, 3, f"Synthetic course {i}."))
+
+    offering_rows = []
+    for semester in SEMESTERS:
+        for course in rng.sample(course_rows, min(offerings_per_semester, courses)):
+            max_students = rng.choice([30, 50, 120, 250])
+            offering_rows.append((
+                len(offering_rows) + 1, course[0], rng.randint(1, professors), semester, rng.choice(SCHEDULES),
+                f"Room {rng.randint(100, 400)}", max_students, rng.randint(0, max_students),
+            ))
+    past_offerings = [row[0] for row in offering_rows if row[3] != SEMESTERS[-1]]
+
+    student_rows = []
+    transcript_rows = []
+    for i in range(1, students + 1):
+        program = rng.choice(list(PROGRAMS))
+        student_rows.append((
+            i, f"student{i}", None, f"student{i}@example.edu", f"Student {i}", program, rng.choice(PROGRAMS[program]),
+            rng.choice(SEMESTERS[:2]), round(rng.uniform(2.5, 4.0), 2), 3 * courses_per_student,
+        ))
+        for offering_id in rng.sample(past_offerings, min(courses_per_student, len(past_offerings))):
+            transcript_rows.append((len(transcript_rows) + 1, i, offering_id, rng.choice(["A", "A", "B", "C"])))
+
+    return {
+        "students": student_rows,
+        "professors": professor_rows,
+        "courses": course_rows,
+        "course_offerings": offering_rows,
+        "transcripts": transcript_rows,
+    }
+
+
+def build_synthetic_db(db_path, students=2000, seed=0):
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+    return bulk_load(db_path, seed=False, tables=synthetic_tables(students=students, seed=seed))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a synthetic university.db for benchmarks.")
+    parser.add_argument("db", help="path of the database to create (overwritten)")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(build_synthetic_db(args.db, students=args.students, seed=args.seed))
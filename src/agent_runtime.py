@@ -0,0 +1,235 @@
+import inspect
+import json
+import sqlite3
+from types import MappingProxyType
+from typing import NamedTuple
+
+from src.gt_tools import gt_tools_dict
+
+
+def function_to_schema(func) -> dict:
+    type_map = {
+        str: "string",
+        int: "integer",
+        float: "number",
+        bool: "boolean",
+        list: "array",
+        dict: "object",
+        type(None): "null",
+    }
+
+    try:
+        signature = inspect.signature(func)
+    except Exception as e:
+        raise ValueError(f"Failed to get signature for function {func.__name__}: {str(e)}")
+
+    parameters = {}
+    for param in signature.parameters.values():
+        if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+        try:
+            param_type = type_map.get(param.annotation, "string")
+        except Exception as e:
+            raise KeyError(
+                f"Unknown type annotation {param.annotation} for parameter {param.name}: {str(e)}"
+            )
+        parameters[param.name] = {"type": param_type}
+
+    required = [
+        param.name
+        for param in signature.parameters.values()
+        if param.default == inspect._empty and param.kind not in (param.VAR_POSITIONAL, param.VAR_KEYWORD)
+    ]
+
+    return {
+        "type": "function",
+        "function": {
+            "name": func.__name__,
+            "description": (func.__doc__ or "").strip(),
+            "parameters": {
+                "type": "object",
+                "properties": parameters,
+                "required": required,
+            }
+        }
+    }
+
+
+def get_tool_schema(tool):
+    """
+    Returns the hand-written schema from gt_tools if there is one, otherwise one generated from the signature.
+    """
+    return gt_tools_dict.get(tool.__name__) or function_to_schema(tool)
+
+
+class ToolArgumentError(ValueError):
+    pass
+
+
+_JSON_TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list,),
+    "object": (dict,),
+}
+
+
+def build_validator(tool, schema):
+    """
+    Returns a function that checks decoded tool-call arguments against the schema and the tool's signature.
+    """
+    parameters = schema["function"].get("parameters", {})
+    properties = parameters.get("properties", {})
+    required = tuple(parameters.get("required", ()))
+    signature = inspect.signature(tool)
+    accepts_any = any(p.kind == p.VAR_KEYWORD for p in signature.parameters.values())
+    accepted = frozenset(name for name in signature.parameters)
+    expected = {name: prop.get("type") for name, prop in properties.items()}
+
+    def validate(args):
+        if not isinstance(args, dict):
+            raise ToolArgumentError("arguments must be a JSON object")
+        # a null optional argument means "use the default"
+        args = {k: v for k, v in args.items() if v is not None or k in required}
+        missing = [name for name in required if name not in args]
+        if missing:
+            raise ToolArgumentError(f"missing required argument(s): {', '.join(missing)}")
+        for name, value in list(args.items()):
+            if name not in accepted and not accepts_any:
+                raise ToolArgumentError(f"unexpected argument: {name}")
+            json_type = expected.get(name)
+            if json_type not in _JSON_TYPES:
+                continue
+            if json_type == "integer" and isinstance(value, float) and value.is_integer():
+                args[name] = value = int(value)
+            if (json_type in ("integer", "number") and isinstance(value, bool)) or not isinstance(value, _JSON_TYPES[json_type]):
+                raise ToolArgumentError(f"argument {name} must be of type {json_type}")
+        return args
+
+    return validate
+
+
+class AgentRuntime(NamedTuple):
+    """
+    Frozen, ready-to-send view of an Agent: system message, tool schemas, name -> tool map and argument validators.
+    """
+    name: str
+    model: str
+    color: str
+    system_message: MappingProxyType
+    tool_schemas: tuple
+    tool_map: MappingProxyType
+    validators: MappingProxyType
+
+    def request_messages(self, messages):
+        return [dict(self.system_message), *messages]
+
+    def request_tools(self):
+        return list(self.tool_schemas) or None
+
+    def parse_arguments(self, tool_call):
+        """
+        Decodes and validates a tool call's arguments. Returns (tool, args) or raises ToolArgumentError.
+        """
+        name = tool_call.function.name
+        tool = self.tool_map.get(name)
+        if tool is None:
+            raise ToolArgumentError(f"unknown tool {name} for {self.name}")
+        try:
+            args = json.loads(tool_call.function.arguments or "{}")
+        except json.JSONDecodeError as e:
+            raise ToolArgumentError(f"arguments are not valid JSON: {e}")
+        return tool, self.validators[name](args)
+
+
+def compile_agent(agent, pinned_text=None):
+    """
+    Builds the runtime of an agent. The system message and tool schemas form a byte-identical prefix on every
+    call: tools are sorted by name and pinned_text (e.g. the database schema) is appended to the instructions
+    once, so the provider's prompt cache can serve it.
+    """
+    schemas = []
+    tool_map = {}
+    validators = {}
+    for tool in sorted(agent.tools, key=lambda t: t.__name__):
+        schema = get_tool_schema(tool)
+        schemas.append(schema)
+        tool_map[tool.__name__] = tool
+        validators[tool.__name__] = build_validator(tool, schema)
+    instructions = agent.instructions
+    if pinned_text:
+        instructions = f"{instructions.rstrip()}\n\n{pinned_text.strip()}"
+    return AgentRuntime(
+        name=agent.name,
+        model=agent.model,
+        color=agent.color,
+        system_message=MappingProxyType({"role": "system", "content": instructions}),
+        tool_schemas=tuple(schemas),
+        tool_map=MappingProxyType(tool_map),
+        validators=MappingProxyType(validators),
+    )
+
+
+_runtimes = {}  # id(agent) -> (agent, runtime, pin version); the agent is kept so its id is never reused
+_pins = {}  # id(agent) -> (agent, function returning the text pinned to its system message, version function)
+# pin version while the pinned text can't be read, e.g. because the database is missing
+_PIN_UNAVAILABLE = object()
+
+
+def compile_agents(*agents):
+    for agent in agents:
+        pin = _pins.get(id(agent))
+        if pin is not None and pin[0] is agent:
+            # compiled on first use so the pinned text isn't read at import time
+            _runtimes.pop(id(agent), None)
+            continue
+        _runtimes[id(agent)] = (agent, compile_agent(agent), None)
+
+
+def pin_text(agent, load_text, version=None):
+    """
+    Appends the text returned by load_text to the agent's system message. load_text is called when the
+    agent is first used and again only when version() (e.g. the database's schema_version) changes, so
+    the request prefix stays fixed in between. If either raises sqlite3.Error the agent runs unpinned.
+    """
+    _pins[id(agent)] = (agent, load_text, version)
+    _runtimes.pop(id(agent), None)
+
+
+def _pin_version(version):
+    if version is None:
+        return None
+    try:
+        return version()
+    except sqlite3.Error:
+        return _PIN_UNAVAILABLE
+
+
+def get_runtime(agent):
+    """
+    Returns the compiled runtime of an agent, compiling agents that were not registered up front.
+    """
+    entry = _runtimes.get(id(agent))
+    pin = _pins.get(id(agent))
+    if pin is None or pin[0] is not agent:
+        if entry is None or entry[0] is not agent:
+            entry = _runtimes[id(agent)] = (agent, compile_agent(agent), None)
+        return entry[1]
+
+    _, load_text, version = pin
+    current = _pin_version(version)
+    if entry is not None and entry[0] is agent and entry[2] == current:
+        return entry[1]
+    pinned_text = None
+    if current is not _PIN_UNAVAILABLE:
+        try:
+            pinned_text = load_text()
+        except sqlite3.Error as e:
+            print(f"[runtime] {agent.name} runs without its pinned text: {e}")
+            current = _PIN_UNAVAILABLE
+    else:
+        print(f"[runtime] {agent.name} runs without its pinned text: it could not be read")
+    entry = _runtimes[id(agent)] = (agent, compile_agent(agent, pinned_text), current)
+    return entry[1]
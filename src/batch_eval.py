@@ -0,0 +1,192 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from src.history import message_field
+from src.tracing import tracer
+
+DEFAULT_CONCURRENCY = 4
+
+
+def read_conversations(path):
+    """
+    Reads conversations from a JSONL file. Each line is {"question": ...}, {"turns": [...]} or a logged
+    conversation {"messages": [...]} whose user messages are replayed; "id" and any other fields are kept.
+    """
+    conversations = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "question" in record:
+                turns = [record["question"]]
+            elif "turns" in record:
+                turns = list(record["turns"])
+            else:
+                turns = [m.get("content") for m in record.get("messages", []) if m.get("role") == "user"]
+            if not turns:
+                print(f"[batch] line {line_no}: no user messages, skipped")
+                continue
+            record.setdefault("id", str(line_no))
+            record["turns"] = turns
+            conversations.append(record)
+    return conversations
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)] if values else 0.0
+
+
+def turn_stats(spans):
+    """
+    Sums the model calls, tokens and tool calls of the spans recorded for one turn.
+    """
+    llm_calls = [s for s in spans if s["kind"] == "llm_call"]
+    tool_calls = [s for s in spans if s["kind"] == "tool_call"]
+    turn = next((s for s in spans if s["kind"] == "turn"), {})
+    return {
+        "model_calls": len(llm_calls),
+        "retries": sum(s.get("attempts", 1) - 1 for s in llm_calls),
+        "prompt_tokens": sum(s.get("prompt_tokens", 0) for s in llm_calls),
+        "cached_tokens": sum(s.get("cached_tokens", 0) for s in llm_calls),
+        "completion_tokens": sum(s.get("completion_tokens", 0) for s in llm_calls),
+        "model_ms": round(sum(s["ms"] for s in llm_calls), 2),
+        "tool_calls": len(tool_calls),
+        "tool_ms": round(sum(s["ms"] for s in tool_calls), 2),
+        "tools": dict(Counter(s["name"] for s in tool_calls)),
+        "tool_errors": sum(1 for s in tool_calls if "error" in s),
+        "handoffs": sum(1 for s in spans if s["kind"] == "handoff"),
+        "forced_final": bool(turn.get("forced_final")),
+        "deadline_exceeded": bool(turn.get("deadline_exceeded")),
+    }
+
+
+def run_conversation(app, conversation):
+    """
+    Runs the user turns of one conversation in order from the triage agent, in a session of its own
+    (own history, agent and calendar login). Returns the conversation's result record.
+    """
+    session = app.new_session(f"batch-{conversation['id']}")
+    result = {key: value for key, value in conversation.items() if key != "turns"}
+    result["turns"] = []
+    start = time.perf_counter()
+
+    def one_turn():
+        with tracer.collect() as spans:
+            turn_start = time.perf_counter()
+            response = app.run_full_turn(session.agent, session.messages)
+            return response, spans, (time.perf_counter() - turn_start) * 1000
+
+    try:
+        for user_text in conversation["turns"]:
+            session.messages.append({"role": "user", "content": user_text})
+            response, spans, latency_ms = session.context.run(one_turn)
+            session.agent = response.agent
+            session.messages.extend(response.messages)
+            result["turns"].append({
+                "user": user_text,
+                "reply": message_field(response.messages[-1], "content") if response.messages else None,
+                "agent": response.agent.name,
+                "latency_ms": round(latency_ms, 2),
+                **turn_stats(spans),
+            })
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    turns = result["turns"]
+    result["final_agent"] = turns[-1]["agent"] if turns else None
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    for key in ("model_calls", "retries", "prompt_tokens", "cached_tokens", "completion_tokens", "tool_calls", "tool_errors", "handoffs"):
+        result[key] = sum(turn[key] for turn in turns)
+    if "expected_agent" in conversation:
+        result["expected_agent_ok"] = result["final_agent"] == conversation["expected_agent"]
+    return result
+
+
+def run_batch(app, conversations, concurrency=DEFAULT_CONCURRENCY, on_result=None):
+    """
+    Runs conversations with at most concurrency of them at once. Results come back in input order;
+    on_result is called with each as soon as it and all before it are done.
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as pool:
+        for result in pool.map(lambda conversation: run_conversation(app, conversation), conversations):
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    return results
+
+
+def summarize(results, wall_s):
+    turns = [turn for result in results for turn in result["turns"]]
+    latencies = [turn["latency_ms"] for turn in turns]
+    tools = Counter()
+    for turn in turns:
+        tools.update(turn["tools"])
+    checked = [r["expected_agent_ok"] for r in results if "expected_agent_ok" in r]
+    summary = {
+        "conversations": len(results),
+        "errors": sum(1 for r in results if "error" in r),
+        "turns": len(turns),
+        "wall_s": round(wall_s, 2),
+        "conversations_per_min": round(len(results) / wall_s * 60, 1) if wall_s else 0.0,
+        "turn_p50_ms": round(percentile(latencies, 0.50), 2),
+        "turn_p95_ms": round(percentile(latencies, 0.95), 2),
+        "model_calls_per_turn": round(sum(t["model_calls"] for t in turns) / len(turns), 2) if turns else 0.0,
+        "prompt_tokens": sum(r["prompt_tokens"] for r in results),
+        "cached_tokens": sum(r["cached_tokens"] for r in results),
+        "completion_tokens": sum(r["completion_tokens"] for r in results),
+        "forced_final_turns": sum(1 for t in turns if t["forced_final"]),
+        "deadline_turns": sum(1 for t in turns if t["deadline_exceeded"]),
+        "tools": dict(tools.most_common()),
+    }
+    if checked:
+        summary["expected_agent_accuracy"] = round(sum(checked) / len(checked), 3)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a JSONL file of student conversations through the agents.")
+    parser.add_argument("conversations", help="JSONL of {question}, {turns: [...]} or {messages: [...]} records")
+    parser.add_argument("-o", "--output", help="results JSONL (default: <input>.results.jsonl)")
+    parser.add_argument("-c", "--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="conversations run at once")
+    parser.add_argument("--limit", type=int, help="only run the first N conversations")
+    parser.add_argument("--summary", help="also write the summary to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="show the agents' replies as they are printed")
+    args = parser.parse_args(argv)
+
+    conversations = read_conversations(args.conversations)[:args.limit]
+    output = args.output or os.path.splitext(args.conversations)[0] + ".results.jsonl"
+
+    import app
+
+    print(f"[batch] {len(conversations)} conversations, concurrency {args.concurrency} -> {output}")
+    start = time.perf_counter()
+    with open(output, "w", encoding="utf-8") as f, open(os.devnull, "w") as devnull:
+        def write(result):
+            f.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+            if "error" in result:
+                print(f"[batch] {result['id']}: {result['error']}", file=sys.stderr)
+
+        # the agents print every reply; keep the console for errors and the summary
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+            results = run_batch(app, conversations, args.concurrency, on_result=write)
+    summary = summarize(results, time.perf_counter() - start)
+
+    print(json.dumps(summary, indent=2))
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
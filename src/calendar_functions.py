@@ -1,9 +1,6 @@
 import datetime as dt
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from google.auth.transport.requests import Request
 import os
+from contextvars import ContextVar
 
 
 SCOPES = ['https://www.googleapis.com/auth/calendar', 'https://mail.google.com/']
@@ -19,6 +16,12 @@ class gtCalendarManager:
     def setup_credentials(self,email):
 
         try:
+            # the Google client libraries take about a second to import; only calendar users pay for it
+            from google.oauth2.credentials import Credentials
+            from google_auth_oauthlib.flow import InstalledAppFlow
+            from googleapiclient.discovery import build
+            from google.auth.transport.requests import Request
+
             user_token_file = os.path.join("credentials", f"{email.split('@')[0]}_token.json")
             credentials_file = os.path.join("credentials", "credentials.json")
             
@@ -187,3 +190,31 @@ class gtCalendarManager:
 
         return formatted_events
 
+
+# the calendar manager of the chat session handling the current request
+current_calendar = ContextVar("current_calendar", default=None)
+
+
+class gtSessionCalendarManager:
+    """
+    Calendar tools that act on the current session's gtCalendarManager, so students chatting
+    at the same time never share credentials. Falls back to one shared manager outside a session.
+    """
+
+    def __init__(self):
+        self._default = gtCalendarManager()
+
+    def _manager(self):
+        return current_calendar.get() or self._default
+
+    def setup_credentials(self, email):
+        return self._manager().setup_credentials(email)
+
+    def create_event(self, summary, start, end, timezone='America/New_York', description=None, location=None, recurrence=None):
+        return self._manager().create_event(summary, start, end, timezone=timezone, description=description, location=location, recurrence=recurrence)
+
+    def delete_event(self, event_id, delete_series=False):
+        return self._manager().delete_event(event_id, delete_series=delete_series)
+
+    def get_events(self, time_min=None, time_max=None):
+        return self._manager().get_events(time_min=time_min, time_max=time_max)
@@ -0,0 +1,186 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from src.history import message_field, message_to_dict
+from src.paths import BASE_DIR
+
+STORE_PATH = os.getenv("CONVERSATION_STORE_PATH", os.path.join(BASE_DIR, "data", "conversations.db"))
+TAIL_TURNS = 20
+COMPACT_INTERVAL_SECONDS = 10 * 60
+# messages kept per session by compaction; older ones are deleted
+MAX_MESSAGES_PER_SESSION = 2000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT,
+    message TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    next_seq INTEGER NOT NULL DEFAULT 0,
+    start_seq INTEGER NOT NULL DEFAULT 0,
+    agent TEXT,
+    updated REAL NOT NULL
+);
+"""
+
+
+class gtConversationStore:
+    """
+    Append-only chat histories in a SQLite WAL database, keyed by session id. A turn writes only its
+    new messages, histories are read back from the end a few turns at a time, and clearing a history
+    just moves its start; the rows are deleted later by compact(), which can run in the background.
+    """
+
+    def __init__(self, path=STORE_PATH, max_messages=MAX_MESSAGES_PER_SESSION):
+        self.path = path
+        self.max_messages = max_messages
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._compactor = None
+        self.stats = {"appended": 0, "compactions": 0, "deleted": 0}
+
+    def append(self, session_id, messages, agent_name=None):
+        """
+        Appends messages to the session's history and remembers the agent that answered last.
+        """
+        rows = [message_to_dict(m) for m in messages]
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            # BEGIN IMMEDIATE takes the write lock first, so two writers never get the same seq
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT OR IGNORE INTO sessions (session_id, updated) VALUES (?, ?)", (session_id, now))
+            next_seq = conn.execute("SELECT next_seq FROM sessions WHERE session_id = ?", (session_id,)).fetchone()[0]
+            conn.executemany(
+                "INSERT INTO messages (session_id, seq, role, message, created) VALUES (?, ?, ?, ?, ?)",
+                [(session_id, next_seq + i, message_field(m, "role"), json.dumps(m, ensure_ascii=False, default=str), now)
+                 for i, m in enumerate(rows)],
+            )
+            conn.execute(
+                "UPDATE sessions SET next_seq = ?, agent = COALESCE(?, agent), updated = ? WHERE session_id = ?",
+                (next_seq + len(rows), agent_name, now, session_id),
+            )
+        self.stats["appended"] += len(rows)
+
+    def tail(self, session_id, turns=TAIL_TURNS, before=None):
+        """
+        Returns (messages, cursor): the last turns user turns of the history, or those before cursor.
+        A turn starts at a user message, so tool results are never separated from their calls.
+        cursor is None when there is nothing older to load.
+        """
+        conn = self._connection()
+        start = conn.execute("SELECT start_seq FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if start is None:
+            return [], None
+        start = start[0]
+        end = before if before is not None else conn.execute(
+            "SELECT next_seq FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()[0]
+        first = conn.execute(
+            "SELECT seq FROM messages WHERE session_id = ? AND seq >= ? AND seq < ? AND role = 'user' "
+            "ORDER BY seq DESC LIMIT 1 OFFSET ?",
+            (session_id, start, end, max(turns, 1) - 1),
+        ).fetchone()
+        if first is None:
+            # fewer turns than asked for: start at the oldest user message, since trimming may have cut a turn
+            first = conn.execute(
+                "SELECT MIN(seq) FROM messages WHERE session_id = ? AND seq >= ? AND seq < ? AND role = 'user'",
+                (session_id, start, end),
+            ).fetchone()
+        first = first[0] if first is not None and first[0] is not None else start
+        rows = conn.execute(
+            "SELECT message FROM messages WHERE session_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+            (session_id, first, end),
+        ).fetchall()
+        older = conn.execute(
+            "SELECT 1 FROM messages WHERE session_id = ? AND seq >= ? AND seq < ? AND role = 'user' LIMIT 1",
+            (session_id, start, first),
+        ).fetchone()
+        return [json.loads(row[0]) for row in rows], (first if older else None)
+
+    def last_agent(self, session_id):
+        row = self._connection().execute("SELECT agent FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return row[0] if row else None
+
+    def clear(self, session_id):
+        """
+        Hides the session's history from now on; compact() deletes it.
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "UPDATE sessions SET start_seq = next_seq, agent = NULL, updated = ? WHERE session_id = ?",
+                (time.time(), session_id),
+            )
+
+    def compact(self, max_idle_seconds=None):
+        """
+        Deletes cleared messages, messages beyond max_messages per session and, with max_idle_seconds,
+        sessions idle for longer, then folds the WAL back into the database file.
+        """
+        conn = self._connection()
+        deleted = 0
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if max_idle_seconds is not None:
+                cutoff = time.time() - max_idle_seconds
+                deleted += conn.execute(
+                    "DELETE FROM messages WHERE session_id IN (SELECT session_id FROM sessions WHERE updated < ?)", (cutoff,)
+                ).rowcount
+                conn.execute("DELETE FROM sessions WHERE updated < ?", (cutoff,))
+            conn.execute("UPDATE sessions SET start_seq = next_seq - ? WHERE next_seq - start_seq > ?", (self.max_messages, self.max_messages))
+            deleted += conn.execute(
+                "DELETE FROM messages WHERE seq < (SELECT start_seq FROM sessions s WHERE s.session_id = messages.session_id)"
+            ).rowcount
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.stats["compactions"] += 1
+        self.stats["deleted"] += deleted
+        return deleted
+
+    def start_compaction(self, interval=COMPACT_INTERVAL_SECONDS, max_idle_seconds=None):
+        """
+        Runs compact() every interval seconds on a daemon thread. Safe to call more than once.
+        """
+        with self._init_lock:
+            if self._compactor is not None:
+                return self._compactor
+
+            def _run():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        self.compact(max_idle_seconds)
+                    except sqlite3.Error as e:
+                        print(f"[store] compaction failed: {e}")
+
+            self._compactor = threading.Thread(target=_run, daemon=True, name="conversation-compaction")
+            self._compactor.start()
+            return self._compactor
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # isolation_level=None: transactions are started explicitly (BEGIN IMMEDIATE) or per statement
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        with self._init_lock:
+            if not self._initialized:
+                conn.executescript(_SCHEMA)
+                self._initialized = True
+        self._local.conn = conn
+        return conn
+
+
+conversation_store = gtConversationStore()
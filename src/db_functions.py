@@ -1,43 +1,492 @@
+import csv
+import io
 import sqlite3
 import os
+import pathlib
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from itertools import count
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # 프로젝트 루트 경로
-DB_PATH = os.path.join(BASE_DIR, "data", "university.db")
+from src.deadline import current_deadline
+from src.paths import BASE_DIR
 
-def get_db_schema(db_path=DB_PATH):
+# UNIVERSITY_DB_PATH points the app (and the benchmarks) at another database file
+DB_PATH = os.getenv("UNIVERSITY_DB_PATH", os.path.join(BASE_DIR, "data", "university.db"))
+
+DEFAULT_MAX_ROWS = 50
+MAX_ROWS_LIMIT = 200
+MAX_RESULT_CHARS = 6000
+MAX_CELL_CHARS = 200
+FETCH_BATCH_SIZE = 500
+# SQLite virtual machine steps between deadline checks
+DEADLINE_CHECK_STEPS = 10000
+
+
+class gtConnectionPool:
+    """
+    Hands out one read-only SQLite connection per thread and reuses it across queries.
+    """
+
+    def __init__(self, db_path=DB_PATH, cache_size_kb=16384, mmap_size=256 * 1024 * 1024, cached_statements=256):
+        self.db_path = db_path
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # key -> (weak reference to the owning thread, connection); keys are never reused, unlike thread idents
+        self._connections = {}
+        self._keys = count()
+        self.metrics = {
+            "pool_hits": 0,
+            "pool_misses": 0,
+            "queries": 0,
+            "errors": 0,
+            "total_query_ms": 0.0,
+            "max_query_ms": 0.0,
+        }
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._count("pool_hits")
+            return conn
+
+        self._count("pool_misses")
+        uri = pathlib.Path(os.path.abspath(self.db_path)).as_uri() + "?mode=ro"
+        # each connection stays on its thread; check_same_thread=False only lets close_all() close it
+        conn = sqlite3.connect(uri, uri=True, cached_statements=self.cached_statements, check_same_thread=False)
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        thread = threading.current_thread()
+        key = next(self._keys)
+        self._local.conn = conn
+        self._local.key = key
+        with self._lock:
+            self._connections[key] = (weakref.ref(thread), conn)
+            stale = [k for k, (ref, _) in self._connections.items() if ref() is None or not ref().is_alive()]
+            stale_connections = [self._connections.pop(k)[1] for k in stale]
+        # closes the connection once the thread object is gone, even if no other thread connects again
+        weakref.finalize(thread, self._close_key, key)
+        for stale_conn in stale_connections:
+            self._close(stale_conn)
+        return conn
+
+    def discard(self):
+        """
+        Closes the calling thread's connection so the next query opens a fresh one.
+        """
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            with self._lock:
+                self._connections.pop(getattr(self._local, "key", None), None)
+            self._close(conn)
+
+    def close_all(self):
+        with self._lock:
+            connections, self._connections = self._connections, {}
+        for _, conn in connections.values():
+            self._close(conn)
+        self._local = threading.local()
+
+    def _close_key(self, key):
+        with self._lock:
+            entry = self._connections.pop(key, None)
+        if entry is not None:
+            self._close(entry[1])
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def record_query(self, elapsed_ms, failed=False):
+        with self._lock:
+            self.metrics["queries"] += 1
+            self.metrics["total_query_ms"] += elapsed_ms
+            self.metrics["max_query_ms"] = max(self.metrics["max_query_ms"], elapsed_ms)
+            if failed:
+                self.metrics["errors"] += 1
+
+    def get_metrics(self):
+        with self._lock:
+            metrics = dict(self.metrics)
+        metrics["open_connections"] = len(self._connections)
+        metrics["avg_query_ms"] = metrics["total_query_ms"] / metrics["queries"] if metrics["queries"] else 0.0
+        return metrics
+
+    def _count(self, key):
+        with self._lock:
+            self.metrics[key] += 1
+
+
+_SQL_TOKEN_RE = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\]|\s+|[^\s'\"`\[]+|.")
+_NONDETERMINISTIC_RE = re.compile(r"random\s*\(|'now'|current_(?:timestamp|date|time)|changes\s*\(|last_insert_rowid")
+
+
+def normalize_sql(sql_query):
+    """
+    Collapses whitespace and case outside of quoted literals and drops trailing semicolons.
+    """
+    parts = []
+    for token in _SQL_TOKEN_RE.findall(sql_query.strip()):
+        if token[0] in "'\"`[":
+            parts.append(token)
+        elif token.isspace():
+            parts.append(" ")
+        else:
+            parts.append(token.lower())
+    return "".join(parts).rstrip("; ")
+
+
+class gtQueryCache:
+    """
+    LRU cache of read-only query results keyed on normalized SQL.
+
+    The cache is cleared whenever the database changes, detected through the
+    size/mtime of the database and WAL files and each connection's
+    PRAGMA data_version (which moves when another connection commits).
+    """
+
+    def __init__(self, max_entries=512, max_bytes=8 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (normalized sql, params, offset, limit) -> (result, nbytes)
+        self._bytes = 0
+        self._generation = 0
+        self._file_signature = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.stats = {"cache_hits": 0, "cache_misses": 0, "cache_invalidations": 0}
+
+    @staticmethod
+    def cache_key(sql_query):
+        key = normalize_sql(sql_query)
+        if not key.startswith(("select", "with")) or _NONDETERMINISTIC_RE.search(key):
+            return None
+        return key
+
+    def validate(self, conn, db_path):
+        """
+        Invalidates the cache if the database changed and returns the current generation.
+        """
+        signature = []
+        for path in (db_path, db_path + "-wal"):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_size, st.st_mtime_ns))
+            except OSError:
+                signature.append(None)
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        seen = getattr(self._local, "data_version", None)
+        self._local.data_version = (id(conn), data_version)
+
+        with self._lock:
+            changed = signature != self._file_signature
+            if seen is not None and seen[0] == id(conn) and seen[1] != data_version:
+                changed = True
+            if changed:
+                if self._file_signature is not None:
+                    self.stats["cache_invalidations"] += 1
+                self._file_signature = signature
+                self._entries.clear()
+                self._bytes = 0
+                self._generation += 1
+            return self._generation
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["cache_misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return entry[0]
+
+    def put(self, key, result, generation):
+        nbytes = len(repr(result))
+        with self._lock:
+            # the database changed while the query ran, so the result may already be stale
+            if generation != self._generation or nbytes > self.max_bytes:
+                return
+            old = self._entries.pop(key, None)
+            if old:
+                self._bytes -= old[1]
+            self._entries[key] = (result, nbytes)
+            self._bytes += nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._bytes -= evicted_bytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._generation += 1
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["cache_entries"] = len(self._entries)
+            stats["cache_bytes"] = self._bytes
+        return stats
+
+
+_pool = gtConnectionPool()
+_query_cache = gtQueryCache()
+
+
+def get_db_metrics():
+    """
+    Returns connection pool, query latency and result cache counters for query_university_db.
+    """
+    metrics = _pool.get_metrics()
+    metrics.update(_query_cache.get_stats())
+    return metrics
+
+def _stem(word):
+    for suffix in ("ings", "ing", "ies", "ed", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)] + ("y" if suffix == "ies" else "")
+    return word
+
+
+class gtSchemaProvider:
+    """
+    Reads table metadata once per PRAGMA schema_version and renders full, compact or question-filtered schemas.
+    """
+
+    def __init__(self):
+        self._cache = {}  # db_path -> (schema_version, tables, rendered)
+        self._lock = threading.Lock()
+
+    def get_schema(self, db_path=DB_PATH, question=None, compact=False):
+        tables, rendered = self._load(db_path)
+        names = list(tables)
+        if question:
+            names = self.relevant_tables(tables, question) or names
+        key = "compact" if compact else "full"
+        return "".join(rendered[name][key] for name in names)
+
+    @staticmethod
+    def relevant_tables(tables, question):
+        """
+        Returns the tables whose name or columns match a word of the question, plus the tables they reference.
+        """
+        words = {_stem(w) for w in re.findall(r"[a-z0-9]+", question.lower())}
+        selected = []
+        for name, info in tables.items():
+            terms = {_stem(p) for p in name.lower().split("_")}
+            for column in info["columns"]:
+                terms.update(_stem(p) for p in column[0].lower().split("_") if p != "id")
+            if words & terms:
+                selected.append(name)
+        for name in list(selected):
+            for _, ref_table, _ in tables[name]["foreign_keys"]:
+                if ref_table in tables and ref_table not in selected:
+                    selected.append(ref_table)
+        return [name for name in tables if name in selected]
+
+    def version(self, db_path=DB_PATH):
+        conn, owned = self._connect(db_path)
+        try:
+            return conn.execute("PRAGMA schema_version").fetchone()[0]
+        finally:
+            if owned:
+                conn.close()
+
+    @staticmethod
+    def _connect(db_path):
+        if os.path.abspath(db_path) == os.path.abspath(_pool.db_path):
+            return _pool.connection(), False
+        uri = pathlib.Path(os.path.abspath(db_path)).as_uri() + "?mode=ro"
+        return sqlite3.connect(uri, uri=True), True
+
+    def _load(self, db_path):
+        conn, owned = self._connect(db_path)
+        try:
+            version = conn.execute("PRAGMA schema_version").fetchone()[0]
+            with self._lock:
+                cached = self._cache.get(db_path)
+            if cached and cached[0] == version:
+                return cached[1], cached[2]
+
+            tables = {}
+            for (table_name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';").fetchall():
+                columns = conn.execute(f"PRAGMA table_info(\"{table_name}\");").fetchall()
+                foreign_keys = conn.execute(f"PRAGMA foreign_key_list(\"{table_name}\");").fetchall()
+                tables[table_name] = {
+                    "columns": [(col[1], col[2], col[5]) for col in columns],
+                    "foreign_keys": [(fk[3], fk[2], fk[4]) for fk in foreign_keys],
+                    "samples": conn.execute(f"SELECT * FROM \"{table_name}\" LIMIT 3").fetchall(),
+                }
+            rendered = {name: self._render(name, info) for name, info in tables.items()}
+            with self._lock:
+                self._cache[db_path] = (version, tables, rendered)
+            return tables, rendered
+        finally:
+            if owned:
+                conn.close()
+
+    @staticmethod
+    def _render(table_name, info):
+        full = [f"Table `{table_name}` columns: "]
+        full.append(", ".join(f"{name} ({col_type})" for name, col_type, _ in info["columns"]) + ".\n")
+        if info["samples"]:
+            full.append(f"Sample data from {table_name}:\n")
+            full.extend(f"  {row}\n" for row in info["samples"])
+            full.append("\n")
+
+        refs = {column: f"{ref_table}.{ref_column}" for column, ref_table, ref_column in info["foreign_keys"]}
+        columns = []
+        for name, col_type, pk in info["columns"]:
+            column = f"{name} {col_type}".strip()
+            if pk:
+                column += " PK"
+            if name in refs:
+                column += f"->{refs[name]}"
+            columns.append(column)
+        compact = f"{table_name}({', '.join(columns)})\n"
+        return {"full": "".join(full), "compact": compact}
+
+
+_schema_provider = gtSchemaProvider()
+
+
+def get_db_schema(db_path=DB_PATH, question: str = None, compact: bool = False):
     """
     Reads the schema of the SQLite database and returns a string description with sample data.
+    Pass the user's question to only get the related tables, and compact=True for one line per table without samples.
+    """
+    return _schema_provider.get_schema(db_path, question=question, compact=compact)
+
+def get_schema_version(db_path=DB_PATH):
     """
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    tables = c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';").fetchall()
-    schema = ""
-    for (table_name,) in tables:
-        schema += f"Table `{table_name}` columns: "
-        columns = c.execute(f"PRAGMA table_info({table_name});").fetchall()
-        schema += ", ".join([f"{col[1]} ({col[2]})" for col in columns]) + ".\n"
-
-        # Fetch sample data
-        sample_data = c.execute(f"SELECT * FROM {table_name} LIMIT 3").fetchall()
-        if sample_data:
-            schema += f"Sample data from {table_name}:\n"
-            for row in sample_data:
-                schema += f"  {row}\n"
-            schema += "\n"
-    conn.close()
-    return schema
-
-def query_university_db(sql_query: str):
-    """
-    Executes a SQL query on university.db and returns the result.
+    Returns the database's PRAGMA schema_version, which changes whenever tables or indexes are (re)created.
     """
+    return _schema_provider.version(db_path)
+
+def fetch_rows(sql_query, params=(), offset=0, limit=None):
+    """
+    Runs a read-only query through the connection pool and the result cache.
+
+    Rows are consumed with fetchmany, so at most offset + limit + 1 rows are read
+    and only `limit` are kept. Returns {"columns", "rows", "has_more"} and lets
+    sqlite3 errors propagate. A query still running when the turn's deadline
+    passes is interrupted.
+    """
+    start = time.perf_counter()
+    failed = False
+    deadline = current_deadline.get()
+    conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        if deadline is not None and deadline.expired():
+            raise sqlite3.OperationalError("interrupted: turn deadline exceeded")
+        conn = _pool.connection()
+        if deadline is not None:
+            conn.set_progress_handler(deadline.expired, DEADLINE_CHECK_STEPS)
+        key = _query_cache.cache_key(sql_query)
+        if key is not None:
+            key = (key, tuple(params), offset, limit)
+            generation = _query_cache.validate(conn, _pool.db_path)
+            cached = _query_cache.get(key)
+            if cached is not None:
+                return dict(cached)
+
         c = conn.cursor()
-        c.execute(sql_query)
-        rows = c.fetchall()
-        columns = [desc[0] for desc in c.description] if c.description else []
-        conn.close()
-        return {"columns": columns, "rows": rows}
+        try:
+            c.execute(sql_query, params)
+            columns = [desc[0] for desc in c.description] if c.description else []
+            skipped = 0
+            while skipped < offset:
+                batch = c.fetchmany(min(FETCH_BATCH_SIZE, offset - skipped))
+                if not batch:
+                    break
+                skipped += len(batch)
+            if limit is None:
+                rows = c.fetchall()
+                has_more = False
+            else:
+                rows = c.fetchmany(limit + 1)
+                has_more = len(rows) > limit
+                rows = rows[:limit]
+        finally:
+            c.close()
+        result = {"columns": columns, "rows": rows, "has_more": has_more}
+        if key is not None:
+            _query_cache.put(key, result, generation)
+            result = dict(result)
+        return result
+    except Exception as e:
+        failed = True
+        # syntax errors and write attempts leave the connection usable; anything else may not
+        if not isinstance(e, (sqlite3.OperationalError, sqlite3.ProgrammingError, sqlite3.Warning)):
+            _pool.discard()
+        raise
+    finally:
+        if deadline is not None and conn is not None:
+            conn.set_progress_handler(None, 0)
+        _pool.record_query((time.perf_counter() - start) * 1000, failed)
+
+
+def _format_cell(value):
+    if value is None:
+        return "NULL"
+    text = str(value)
+    if len(text) > MAX_CELL_CHARS:
+        return f"{text[:MAX_CELL_CHARS]}...[+{len(text) - MAX_CELL_CHARS} chars]"
+    return text
+
+
+def render_rows(columns, rows, cursor=0, has_more=False, max_chars=MAX_RESULT_CHARS):
+    """
+    Renders query results as CSV with a footer telling the model how to fetch the next page.
+    """
+    if not columns:
+        return "OK (statement returned no rows)"
+    if not rows:
+        return ",".join(columns) + "\n(no rows)" if cursor == 0 else "(no more rows)"
+
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(columns)
+    shown = 0
+    for row in rows:
+        mark = out.tell()
+        writer.writerow([_format_cell(v) for v in row])
+        if out.tell() > max_chars and shown:
+            out.seek(mark)
+            out.truncate()
+            has_more = True
+            break
+        shown += 1
+
+    first, last = cursor + 1, cursor + shown
+    if has_more:
+        out.write(f"[rows {first}-{last} shown, more rows available: call again with cursor={last}]")
+    elif cursor:
+        out.write(f"[rows {first}-{last} shown, end of results]")
+    else:
+        out.write(f"[{shown} rows]")
+    return out.getvalue()
+
+
+def query_university_db(sql_query: str, cursor: int = 0, max_rows: int = DEFAULT_MAX_ROWS):
+    """
+    Executes a SQL query on university.db and returns the result as CSV, one page of rows at a time.
+    """
+    try:
+        cursor = max(int(cursor or 0), 0)
+        max_rows = max(1, min(int(max_rows or DEFAULT_MAX_ROWS), MAX_ROWS_LIMIT))
+        result = fetch_rows(sql_query, offset=cursor, limit=max_rows)
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+    return render_rows(result["columns"], result["rows"], cursor, result["has_more"])
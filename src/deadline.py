@@ -0,0 +1,33 @@
+import time
+from contextvars import ContextVar
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class gtDeadline:
+    """
+    A point in time by which a turn has to finish. Model calls and tools shorten their own timeouts to fit.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def timeout(self, limit=None):
+        """
+        Returns the time left, capped at limit.
+        """
+        remaining = self.remaining()
+        return remaining if limit is None else min(limit, remaining)
+
+
+# the deadline of the turn a tool is running for, if any
+current_deadline = ContextVar("current_deadline", default=None)
@@ -1,5 +1,5 @@
 import gradio as gr
-from src.main import run_full_turn, triage_agent
+from app import run_full_turn, triage_agent
 
 def _content(m):
     return m["content"] if isinstance(m, dict) else m.content
@@ -21,5 +21,6 @@ def chat_fn(user_msg, history, state):
     history.append((user_msg, assistant_reply))
     return history, state
 
-demo = gr.ChatInterface(fn=chat_fn, state=gr.State()).queue()
-demo.launch()
\ No newline at end of file
+if __name__ == "__main__":
+    demo = gr.ChatInterface(fn=chat_fn, state=gr.State()).queue()
+    demo.launch()
\ No newline at end of file
@@ -87,6 +87,35 @@ gt_tools = [
             }
         }
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_program_details",
+            "description": "Searches a program's documents and returns only the passages most relevant to the question. Prefer this over get_program_details.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "program_name": {
+                        "type": "string",
+                        "description": "The name of the program to search (e.g., 'ms-cs')."
+                    },
+                    "query": {
+                        "type": "string",
+                        "description": "The question or keywords to look up in the program documents."
+                    },
+                    "top_k": {
+                        "type": "integer",
+                        "description": "The maximum number of passages to return. Defaults to 5."
+                    },
+                    "max_chars": {
+                        "type": "integer",
+                        "description": "The maximum total characters of returned passages (about 4 characters per token). Defaults to 4000."
+                    }
+                },
+                "required": ["program_name", "query"]
+            }
+        }
+    },
     {
         "type": "function",
         "function": {
@@ -299,17 +328,97 @@ gt_tools = [
             }
         }
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_db_schema",
+            "description": "Returns the university database schema. Pass the user's question to get only the related tables.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "question": {
+                        "type": "string",
+                        "description": "Optional question or keywords used to select the relevant tables."
+                    },
+                    "compact": {
+                        "type": "boolean",
+                        "description": "If true, returns one line per table without sample rows. Defaults to false."
+                    }
+                },
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "check_schedule_conflicts",
+            "description": "Checks a set of course offerings for time conflicts and returns every conflicting pair with the overlapping days and times.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "offering_ids": {
+                        "type": "array",
+                        "items": {"type": "integer"},
+                        "description": "The offering_id values from course_offerings to check against each other."
+                    }
+                },
+                "required": ["offering_ids"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "recommend_course_bundles",
+            "description": "Lists the course offerings a student can still take in a semester (not taken yet and not full) and combinations of courses with no schedule conflicts.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "student_id": {
+                        "type": "integer",
+                        "description": "The id of the student in the students table."
+                    },
+                    "semester": {
+                        "type": "string",
+                        "description": "The target semester (e.g., 'Fall 2025')."
+                    },
+                    "bundle_size": {
+                        "type": "integer",
+                        "description": "The number of courses per combination (1-5). Defaults to 3."
+                    },
+                    "max_bundles": {
+                        "type": "integer",
+                        "description": "The maximum number of combinations to return. Defaults to 10."
+                    },
+                    "max_credits": {
+                        "type": "integer",
+                        "description": "The maximum total credits of a combination. Optional; if bundle_size courses cannot fit under it, bundle_size is lowered and the result has a note."
+                    }
+                },
+                "required": ["student_id", "semester"]
+            }
+        }
+    },
     {
     "type": "function",
     "function": {
         "name": "query_university_db",
-        "description": "Executes a SQL query on the university database and returns the result.",
+        "description": "Executes a read-only SQL query on the university database and returns the result as CSV, at most max_rows rows per call. If more rows are available the result ends with the cursor to pass to get the next page.",
         "parameters": {
             "type": "object",
             "properties": {
                 "sql_query": {
                     "type": "string",
                     "description": "The SQL query to execute on university.db"
+                },
+                "cursor": {
+                    "type": "integer",
+                    "description": "The row offset to continue from, as given at the end of a previous result. Defaults to 0."
+                },
+                "max_rows": {
+                    "type": "integer",
+                    "description": "The maximum number of rows to return (1-200). Defaults to 50."
                 }
             },
             "required": ["sql_query"]
@@ -0,0 +1,218 @@
+import csv
+import datetime as dt
+import io
+import json
+import re
+
+from src.history import message_field
+
+BRIEF_PREFIX = "Hand-off brief from the previous agent (the full conversation is not repeated):"
+RECENT_USER_TURNS = 3
+MAX_TURN_CHARS = 500
+MAX_FINDING_CHARS = 800
+MAX_TOOL_ARGUMENT_CHARS = 200
+MAX_TOOL_RESULT_CHARS = 600
+
+# students columns worth carrying over; anything else in a query result stays with the agent that ran it
+PROFILE_COLUMNS = (
+    "full_name", "username", "email", "program", "specialization",
+    "semester_enrolled", "gpa", "credits_completed",
+)
+_SEASONS = ("Spring", "Summer", "Fall")
+_SEMESTER_RE = re.compile(r"\b(spring|summer|fall)\s*'?(\d{4}|\d{2})\b", re.IGNORECASE)
+_RELATIVE_SEMESTER_RE = re.compile(r"\b(this|current|next|last|previous)\s+(semester|term)\b", re.IGNORECASE)
+_STUDENT_ID_RES = (
+    re.compile(r"\bstudent[\s_-]*id\b\D{0,10}(\d+)", re.IGNORECASE),
+    re.compile(r"\bmy\s+id\s+(?:is\s+)?#?(\d+)", re.IGNORECASE),
+)
+_SQL_STUDENT_ID_RE = re.compile(r"\b(?:student_id|students\.id)\s*=\s*(\d+)", re.IGNORECASE)
+
+
+def semester_of(date):
+    if date.month <= 4:
+        return "Spring", date.year
+    if date.month <= 7:
+        return "Summer", date.year
+    return "Fall", date.year
+
+
+def resolve_semester(text, today=None):
+    """
+    Returns the semester a text refers to as e.g. "Fall 2025", resolving "this/next/last semester"
+    against today's date, or None if the text names no semester.
+    """
+    match = _SEMESTER_RE.search(text or "")
+    if match:
+        year = int(match.group(2))
+        return f"{match.group(1).title()} {year + 2000 if year < 100 else year}"
+    match = _RELATIVE_SEMESTER_RE.search(text or "")
+    if not match:
+        return None
+    season, year = semester_of(today or dt.date.today())
+    index = _SEASONS.index(season)
+    step = {"next": 1, "last": -1, "previous": -1}.get(match.group(1).lower(), 0)
+    year += (index + step) // len(_SEASONS)
+    return f"{_SEASONS[(index + step) % len(_SEASONS)]} {year}"
+
+
+def _parse_csv_result(content):
+    """
+    Returns (columns, rows) of a query_university_db result, dropping its "[n rows]" footer.
+    """
+    lines = [line for line in content.splitlines() if line and not line.startswith("[") and line != "(no rows)"]
+    if not lines:
+        return [], []
+    parsed = list(csv.reader(io.StringIO("\n".join(lines))))
+    return parsed[0], parsed[1:]
+
+
+def _profile_from_result(content):
+    try:
+        columns, rows = _parse_csv_result(content)
+    except csv.Error:
+        return {}
+    # only a single student's row is a profile; a listing of many students is not
+    if len(rows) != 1 or "full_name" not in columns or len(rows[0]) != len(columns):
+        return {}
+    row = dict(zip(columns, rows[0]))
+    facts = {name: row[name] for name in PROFILE_COLUMNS if row.get(name)}
+    if row.get("id") and ("program" in row or "semester_enrolled" in row):
+        facts["student_id"] = row["id"]
+    return facts
+
+
+def _tool_calls_by_id(messages):
+    calls = {}
+    for message in messages:
+        for tool_call in message_field(message, "tool_calls") or []:
+            function = message_field(tool_call, "function")
+            calls[message_field(tool_call, "id")] = message_field(function, "name")
+    return calls
+
+
+def extract_facts(messages, today=None):
+    """
+    Collects the user profile facts and the semester under discussion from a conversation:
+    the user's own statements, tool-call arguments and single-student query results.
+    """
+    facts = {}
+    semester = None
+    tool_names = _tool_calls_by_id(messages)
+    for message in messages:
+        role = message_field(message, "role")
+        content = message_field(message, "content") or ""
+        if role == "user":
+            for pattern in _STUDENT_ID_RES:
+                match = pattern.search(content)
+                if match:
+                    facts["student_id"] = match.group(1)
+            semester = resolve_semester(content, today) or semester
+        elif role == "tool":
+            if tool_names.get(message_field(message, "tool_call_id")) == "query_university_db":
+                facts.update(_profile_from_result(content))
+        elif role == "assistant":
+            for tool_call in message_field(message, "tool_calls") or []:
+                function = message_field(tool_call, "function")
+                arguments = message_field(function, "arguments") or ""
+                try:
+                    args = json.loads(arguments)
+                except json.JSONDecodeError:
+                    args = {}
+                if not isinstance(args, dict):
+                    args = {}
+                if args.get("student_id") is not None:
+                    facts["student_id"] = str(args["student_id"])
+                if isinstance(args.get("semester"), str):
+                    semester = resolve_semester(args["semester"], today) or semester
+                match = _SQL_STUDENT_ID_RE.search(str(args.get("sql_query", "")))
+                if match:
+                    facts["student_id"] = match.group(1)
+    return facts, semester
+
+
+def recent_user_turns(messages, count=RECENT_USER_TURNS):
+    """
+    Returns the last count user messages, each followed by the final assistant answer of its turn,
+    leaving out tool calls and tool results.
+    """
+    turns = []
+    for message in messages:
+        role = message_field(message, "role")
+        content = message_field(message, "content")
+        if role == "user":
+            turns.append([{"role": "user", "content": (content or "")[:MAX_TURN_CHARS]}, None])
+        elif role == "assistant" and content and turns and not message_field(message, "tool_calls"):
+            turns[-1][1] = {"role": "assistant", "content": content[:MAX_TURN_CHARS]}
+    scoped = []
+    for user, answer in turns[-count:]:
+        scoped.append(user)
+        # the current turn has no final answer yet
+        if answer is not None:
+            scoped.append(answer)
+    return scoped
+
+
+def _truncate(text, limit):
+    return text if len(text) <= limit else text[:limit - 4] + " ..."
+
+
+def turn_tool_results(messages):
+    """
+    Returns "name(arguments): result" for each tool call made since the user's last message, transfers
+    excepted, so the receiving agent can use those results instead of repeating the lookups.
+    """
+    start = next((i + 1 for i in range(len(messages) - 1, -1, -1) if message_field(messages[i], "role") == "user"), 0)
+    turn = messages[start:]
+    calls = {}
+    for message in turn:
+        for tool_call in message_field(message, "tool_calls") or []:
+            function = message_field(tool_call, "function")
+            calls[message_field(tool_call, "id")] = (message_field(function, "name"), message_field(function, "arguments") or "")
+    results = []
+    for message in turn:
+        if message_field(message, "role") != "tool":
+            continue
+        name, arguments = calls.get(message_field(message, "tool_call_id"), (None, ""))
+        if name is None or name.startswith("transfer_to_"):
+            continue
+        content = _truncate(str(message_field(message, "content") or ""), MAX_TOOL_RESULT_CHARS)
+        results.append(f"{name}({_truncate(arguments, MAX_TOOL_ARGUMENT_CHARS)}): {content}")
+    return results
+
+
+def build_brief(messages, from_agent, to_agent, today=None):
+    """
+    Builds the system message handed to the receiving agent: profile facts, resolved semester and
+    what the previous agent found in this turn. The question itself follows in the recent user turns.
+    """
+    facts, semester = extract_facts(messages, today)
+
+    # assistant text written since the user's last message, e.g. the db agent's profile summary
+    findings = []
+    for message in reversed(messages):
+        role = message_field(message, "role")
+        if role == "user":
+            break
+        if role == "assistant" and message_field(message, "content"):
+            findings.insert(0, message_field(message, "content"))
+
+    lines = [BRIEF_PREFIX, f"- transferred from: {from_agent} to: {to_agent}"]
+    if facts:
+        lines.append("- user profile: " + "; ".join(f"{k}={v}" for k, v in facts.items()))
+    if semester:
+        lines.append(f"- semester: {semester}")
+    if findings:
+        lines.append(f"- previous agent's findings: {' '.join(findings)[:MAX_FINDING_CHARS]}")
+    tool_results = turn_tool_results(messages)
+    if tool_results:
+        lines.append("- results of the previous agent's tool calls in this turn (use them instead of calling again):")
+        lines.extend(f"  - {result}" for result in tool_results)
+    return {"role": "system", "content": "\n".join(lines)}
+
+
+def handoff_context(messages, from_agent, to_agent, today=None):
+    """
+    Returns the messages that replace the shared history for an agent that just received control:
+    the brief followed by the recent user turns. The receiving agent's own messages are appended after it.
+    """
+    return [build_brief(messages, from_agent, to_agent, today), *recent_user_turns(messages)]
@@ -0,0 +1,134 @@
+import json
+import re
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_PREFIX = "Summary of the earlier conversation (older messages were removed to save space):"
+SUMMARY_MAX_CHARS = 2000
+_TRUNCATED_RE = re.compile(r"\.\.\.\[truncated \d+ chars\]$")
+
+
+def message_field(message, key, default=None):
+    """
+    Reads a field from a chat message stored either as a dict or as an OpenAI message object.
+    """
+    if isinstance(message, dict):
+        return message.get(key, default)
+    return getattr(message, key, default)
+
+
+def message_to_dict(message):
+    if isinstance(message, dict):
+        return message
+    if hasattr(message, "model_dump"):
+        return message.model_dump(exclude_none=True)
+    return {"role": message_field(message, "role"), "content": message_field(message, "content")}
+
+
+def estimate_tokens(message):
+    """
+    Rough token count of a message (about 4 characters per token), without a tokenizer dependency.
+    """
+    chars = len(message_field(message, "content") or "")
+    for tool_call in message_field(message, "tool_calls") or []:
+        function = message_field(tool_call, "function")
+        chars += len(message_field(function, "name") or "") + len(message_field(function, "arguments") or "")
+    return chars // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+def split_turns(messages):
+    """
+    Groups messages into turns that each start with a user message, so an assistant
+    message and the tool results answering its tool calls always stay together.
+    """
+    turns = []
+    for message in messages:
+        if message_field(message, "role") == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+class gtHistoryManager:
+    """
+    Keeps the history sent to the model under a token budget.
+
+    Tool results outside the most recent turns are truncated first; if the history is
+    still over budget, the oldest whole turns are replaced by a short summary message.
+    """
+
+    def __init__(self, token_budget=8000, keep_recent_turns=2, tool_result_chars=600):
+        self.token_budget = token_budget
+        self.keep_recent_turns = keep_recent_turns
+        self.tool_result_chars = tool_result_chars
+
+    def compact(self, messages):
+        turns = split_turns(messages)
+        # a history that was cut elsewhere must not start with orphaned tool results
+        while turns and turns[0] and message_field(turns[0][0], "role") == "tool":
+            turns[0].pop(0)
+            if not turns[0]:
+                turns.pop(0)
+
+        recent = max(len(turns) - self.keep_recent_turns, 0)
+        turns = [
+            [self._truncate(m) for m in turn] if i < recent else turn
+            for i, turn in enumerate(turns)
+        ]
+
+        total = sum(estimate_tokens(m) for turn in turns for m in turn)
+        dropped = []
+        while total > self.token_budget and len(turns) > self.keep_recent_turns:
+            turn = turns.pop(0)
+            dropped.append(turn)
+            total -= sum(estimate_tokens(m) for m in turn)
+
+        summary = self._summarize(dropped) if dropped else None
+        if summary is not None:
+            total += estimate_tokens(summary)
+
+        if total > self.token_budget and len(turns) > 1:
+            # still too large: also shorten tool results of recent turns except the current one
+            turns = [[self._truncate(m) for m in turn] for turn in turns[:-1]] + turns[-1:]
+
+        compacted = [m for turn in turns for m in turn]
+        if summary is not None:
+            compacted.insert(0, summary)
+        return compacted
+
+    def _truncate(self, message):
+        if message_field(message, "role") != "tool":
+            return message
+        content = message_field(message, "content") or ""
+        if len(content) <= self.tool_result_chars:
+            return message
+        marker = _TRUNCATED_RE.search(content)
+        if marker and marker.start() <= self.tool_result_chars:
+            # already truncated by an earlier compaction
+            return message
+        truncated = dict(message_to_dict(message))
+        truncated["content"] = f"{content[:self.tool_result_chars]}...[truncated {len(content) - self.tool_result_chars} chars]"
+        return truncated
+
+    def _summarize(self, turns):
+        lines = []
+        for turn in turns:
+            for message in turn:
+                role = message_field(message, "role")
+                content = (message_field(message, "content") or "").strip()
+                if role == "system" and content.startswith(SUMMARY_PREFIX):
+                    lines.extend(content[len(SUMMARY_PREFIX):].strip().splitlines())
+            user = next((m for m in turn if message_field(m, "role") == "user"), None)
+            answer = next(
+                (m for m in reversed(turn) if message_field(m, "role") == "assistant" and message_field(m, "content")),
+                None,
+            )
+            if user is not None:
+                line = f"- user: {json.dumps((message_field(user, 'content') or '')[:200], ensure_ascii=False)}"
+                if answer is not None:
+                    line += f" -> assistant: {json.dumps(message_field(answer, 'content')[:300], ensure_ascii=False)}"
+                lines.append(line)
+        body = "\n".join(lines)
+        if len(body) > SUMMARY_MAX_CHARS:
+            body = "..." + body[-SUMMARY_MAX_CHARS:]
+        return {"role": "system", "content": f"{SUMMARY_PREFIX}\n{body}"}
@@ -0,0 +1,121 @@
+import random
+import threading
+import time
+
+from src.deadline import DeadlineExceeded
+
+CALL_TIMEOUT_SECONDS = 30.0
+MAX_RETRIES = 3
+BASE_DELAY_SECONDS = 0.5
+MAX_DELAY_SECONDS = 8.0
+
+
+def _retry_after(error):
+    """
+    Returns the delay the service asked for in Retry-After / retry-after-ms, or None.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass  # an HTTP date instead of seconds; fall back to backoff
+    return None
+
+
+def classify_error(error):
+    """
+    Returns the metric name of a retryable error, or None if retrying would not help.
+    """
+    import openai  # already loaded by the client that raised the error
+
+    if isinstance(error, openai.APITimeoutError):
+        return "timeouts"
+    if isinstance(error, openai.APIConnectionError):
+        return "connection_errors"
+    if isinstance(error, openai.RateLimitError):
+        return "rate_limited"
+    if isinstance(error, openai.APIStatusError) and error.status_code >= 500:
+        return "server_errors"
+    return None
+
+
+class gtRetryPolicy:
+    """
+    Calls the model with a per-call timeout and retries timeouts, connection errors, 429s and 5xx
+    with jittered exponential backoff, waiting as long as Retry-After asks. Never waits past the turn deadline.
+    """
+
+    def __init__(self, call_timeout=CALL_TIMEOUT_SECONDS, max_retries=MAX_RETRIES,
+                 base_delay=BASE_DELAY_SECONDS, max_delay=MAX_DELAY_SECONDS):
+        self.call_timeout = call_timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self.metrics = {
+            "calls": 0,
+            "attempts": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "server_errors": 0,
+            "timeouts": 0,
+            "connection_errors": 0,
+            "deadline_hits": 0,
+            "failures": 0,
+            "retry_wait_s": 0.0,
+        }
+
+    def backoff(self, attempt):
+        # "full jitter": spreads the retries of many turns throttled at the same moment
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, create, deadline=None, **kwargs):
+        """
+        Runs create(timeout=..., **kwargs) until it succeeds, the retries run out or the deadline passes.
+        Returns (result, attempts). Raises the last error, or DeadlineExceeded.
+        """
+        self._count("calls")
+        attempt = 0
+        while True:
+            timeout = self.call_timeout if deadline is None else deadline.timeout(self.call_timeout)
+            if timeout <= 0:
+                self._count("deadline_hits")
+                raise DeadlineExceeded(f"turn deadline of {deadline.seconds:g} s exceeded before the model answered")
+            self._count("attempts")
+            try:
+                return create(timeout=timeout, **kwargs), attempt + 1
+            except Exception as e:
+                reason = classify_error(e)
+                if reason is None:
+                    self._count("failures")
+                    raise
+                self._count(reason)
+                if attempt >= self.max_retries:
+                    self._count("failures")
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = self.backoff(attempt)
+                if deadline is not None and delay >= deadline.remaining():
+                    self._count("deadline_hits")
+                    raise DeadlineExceeded(f"turn deadline of {deadline.seconds:g} s leaves no time to retry: {e}") from e
+                attempt += 1
+                with self._lock:
+                    self.metrics["retries"] += 1
+                    self.metrics["retry_wait_s"] += delay
+                time.sleep(delay)
+
+    def record_deadline_hit(self):
+        self._count("deadline_hits")
+
+    def get_metrics(self):
+        with self._lock:
+            return dict(self.metrics)
+
+    def _count(self, key):
+        with self._lock:
+            self.metrics[key] += 1
@@ -0,0 +1,237 @@
+import hashlib
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from src.history import message_field
+from src.tracing import payload_chars
+
+CHARS_PER_TOKEN = 4
+# Azure serves cached prompt prefixes of at least 1024 tokens, in 128-token steps
+CACHE_MIN_TOKENS = 1024
+CACHE_BLOCK_TOKENS = 128
+
+
+def script_responder(steps):
+    """
+    Returns a responder that replays steps in order, one per model call, e.g.
+    {"content": "Hi"} or {"tool_calls": [{"name": "transfer_to_db_agent", "arguments": {}}]}.
+    """
+    steps = iter(list(steps))
+    lock = threading.Lock()
+
+    def respond(messages, tools):
+        with lock:
+            return next(steps)
+
+    return respond
+
+
+class MockAzureOpenAI:
+    """
+    Offline stand-in for the AzureOpenAI client. chat.completions.create asks responder(messages, tools)
+    for the next assistant step and returns it as a ChatCompletion, or as ChatCompletionChunks when
+    stream=True, after the configured latency. Usage is estimated from the request size, and prompt
+    prefixes (system message and tools) seen before are reported as cached tokens like the real service.
+    """
+
+    def __init__(self, responder, latency=0.0, chunk_latency=0.0, chunk_chars=16):
+        self.responder = responder
+        self.latency = latency
+        self.chunk_latency = chunk_latency
+        self.chunk_chars = chunk_chars
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._prefixes = set()
+        self.calls = 0
+
+    def create(self, model=None, messages=(), tools=None, stream=False, stream_options=None, **kwargs):
+        messages = list(messages)
+        step = self.responder(messages, tools) or {}
+        with self._lock:
+            self.calls += 1
+            completion_id = f"chatcmpl-mock-{next(self._ids)}"
+            tool_calls = [
+                {
+                    "id": f"call_{next(self._ids)}",
+                    "type": "function",
+                    "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments", {}))},
+                }
+                for call in step.get("tool_calls") or []
+            ]
+        content = step.get("content")
+        usage = self._usage(messages, tools, content, tool_calls)
+
+        if self.latency:
+            time.sleep(self.latency)
+        if stream:
+            include_usage = bool((stream_options or {}).get("include_usage"))
+            return self._stream(completion_id, model, content, tool_calls, usage if include_usage else None)
+
+        message = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        return ChatCompletion.model_validate({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model or "mock",
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+            }],
+            "usage": usage,
+        })
+
+    def _stream(self, completion_id, model, content, tool_calls, usage):
+        def chunk(delta=None, finish_reason=None, usage=None):
+            return ChatCompletionChunk.model_validate({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model or "mock",
+                "choices": [] if delta is None else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                "usage": usage,
+            })
+
+        yield chunk({"role": "assistant"})
+        for start in range(0, len(content or ""), self.chunk_chars):
+            if self.chunk_latency:
+                time.sleep(self.chunk_latency)
+            yield chunk({"content": content[start:start + self.chunk_chars]})
+        for index, call in enumerate(tool_calls):
+            # like the service: the first fragment has the id and name, the arguments follow in pieces
+            yield chunk({"tool_calls": [{"index": index, "id": call["id"], "type": "function",
+                                         "function": {"name": call["function"]["name"], "arguments": ""}}]})
+            arguments = call["function"]["arguments"]
+            for start in range(0, len(arguments), self.chunk_chars):
+                yield chunk({"tool_calls": [{"index": index, "function": {"arguments": arguments[start:start + self.chunk_chars]}}]})
+        yield chunk({}, finish_reason="tool_calls" if tool_calls else "stop")
+        if usage is not None:
+            yield chunk(usage=usage)
+
+    def _usage(self, messages, tools, content, tool_calls):
+        tools_text = json.dumps(tools or [], sort_keys=True)
+        prompt_tokens = (payload_chars(messages) + len(tools_text)) // CHARS_PER_TOKEN + 4 * len(messages)
+        completion_tokens = (len(content or "") + sum(len(c["function"]["arguments"]) for c in tool_calls)) // CHARS_PER_TOKEN + 1
+
+        prefix = (message_field(messages[0], "content") or "") if messages else ""
+        prefix_tokens = (len(prefix) + len(tools_text)) // CHARS_PER_TOKEN
+        key = hashlib.sha1((prefix + tools_text).encode("utf-8")).hexdigest()
+        with self._lock:
+            seen = key in self._prefixes
+            self._prefixes.add(key)
+        cached = 0
+        if seen and prefix_tokens >= CACHE_MIN_TOKENS:
+            cached = min(prefix_tokens, prompt_tokens) // CACHE_BLOCK_TOKENS * CACHE_BLOCK_TOKENS
+
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached},
+        }
+
+
+class MockOpenAIServer:
+    """
+    Local HTTP server speaking the Azure OpenAI chat completions API, for testing the real client's
+    timeouts and retries. Answers come from the same responder as MockAzureOpenAI; queued faults are
+    served first, e.g. {"status": 429, "retry_after": 1}, {"status": 503} or {"delay": 5} (a slow answer).
+
+        with MockOpenAIServer(responder) as server:
+            client = AzureOpenAI(api_key="x", api_version="2024-12-01-preview", azure_endpoint=server.url)
+    """
+
+    def __init__(self, responder, latency=0.0, host="127.0.0.1", port=0):
+        self.mock = MockAzureOpenAI(responder, latency=latency)
+        self.faults = deque()
+        self.requests = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_fault(self, status=None, retry_after=None, delay=0.0):
+        self.faults.append({"status": status, "retry_after": retry_after, "delay": delay})
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="mock-openai")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                try:
+                    self._respond()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up, e.g. after its timeout
+
+            def _respond(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                server.requests += 1
+                try:
+                    fault = server.faults.popleft()
+                except IndexError:
+                    fault = None
+                if fault and fault["delay"]:
+                    time.sleep(fault["delay"])
+                if fault and fault["status"]:
+                    payload = json.dumps({"error": {"code": str(fault["status"]), "message": "mock fault"}}).encode()
+                    self.send_response(fault["status"])
+                    if fault["retry_after"] is not None:
+                        self.send_header("Retry-After", str(fault["retry_after"]))
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+
+                result = server.mock.create(**body)
+                if not body.get("stream"):
+                    payload = result.model_dump_json(exclude_none=True).encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for chunk in result:
+                    self.wfile.write(f"data: {chunk.model_dump_json(exclude_none=True)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+        return Handler
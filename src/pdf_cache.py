@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from src.paths import BASE_DIR
+
+CACHE_DIR = os.path.join(BASE_DIR, "data", "pdf_cache")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def extract_pdf_pages(file_path):
+    """
+    Parses a PDF and returns the extracted text of each page as a list.
+    """
+    from PyPDF2 import PdfReader  # imported on first parse; cached pages never need it
+
+    reader = PdfReader(file_path)
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+    h = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class gtPdfTextCache:
+    """
+    Two-level (memory + disk) cache of text extracted from PDF files.
+
+    Entries are keyed by file path and validated against the file's size and
+    mtime. When those change, the content hash decides whether the file really
+    changed: disk entries are content-addressed, so a touched-but-identical PDF
+    is never re-parsed. The memory level is an LRU bounded by total text bytes.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path -> (size, mtime_ns, digest, pages, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "parses": 0, "evictions": 0}
+
+    def get_pages(self, file_path):
+        """
+        Returns the page texts of a PDF, parsing it only if its content changed.
+        """
+        file_path = os.path.abspath(file_path)
+        pages, st, digest = self._lookup(file_path)
+        if pages is None:
+            pages = extract_pdf_pages(file_path)
+            self._count("parses")
+            self._save_to_disk(digest, pages)
+            self._remember(file_path, st.st_size, st.st_mtime_ns, digest, pages)
+        return pages
+
+    def lookup(self, file_path):
+        """
+        Returns the cached page texts of a PDF, or None if it has to be parsed.
+        """
+        return self._lookup(os.path.abspath(file_path))[0]
+
+    def _lookup(self, file_path):
+        """
+        Returns (pages, stat, digest); pages is None on a miss, and the digest is None on a memory hit
+        (where the file is not hashed), so a caller that parses next does not hash the file again.
+        """
+        st = os.stat(file_path)
+
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+                self._entries.move_to_end(file_path)
+                self.stats["memory_hits"] += 1
+                return entry[3], st, None
+
+        digest = hash_file(file_path)
+        if entry and entry[2] == digest:
+            pages = entry[3]
+            self._count("memory_hits")
+        else:
+            pages = self._load_from_disk(digest)
+            if pages is None:
+                return None, st, digest
+            self._count("disk_hits")
+
+        self._remember(file_path, st.st_size, st.st_mtime_ns, digest, pages)
+        return pages, st, digest
+
+    def put_pages(self, file_path, pages):
+        """
+        Stores already extracted page texts for a PDF (e.g. from a worker process).
+        """
+        file_path = os.path.abspath(file_path)
+        st = os.stat(file_path)
+        digest = hash_file(file_path)
+        self._save_to_disk(digest, pages)
+        self._remember(file_path, st.st_size, st.st_mtime_ns, digest, pages)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _remember(self, file_path, size, mtime_ns, digest, pages):
+        nbytes = sum(len(p) for p in pages)
+        with self._lock:
+            old = self._entries.pop(file_path, None)
+            if old:
+                self._bytes -= old[4]
+            if nbytes > self.max_bytes:
+                return
+            self._entries[file_path] = (size, mtime_ns, digest, pages, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[4]
+                self.stats["evictions"] += 1
+
+    def _disk_path(self, digest):
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.json")
+
+    def _load_from_disk(self, digest):
+        try:
+            with open(self._disk_path(digest), "r", encoding="utf-8") as f:
+                return json.load(f)["pages"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save_to_disk(self, digest, pages):
+        path = self._disk_path(digest)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"pages": pages}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[pdf cache] could not write {path}: {e}")
+
+
+pdf_text_cache = gtPdfTextCache()
@@ -1,34 +1,50 @@
-from PyPDF2 import PdfReader
 import os
 
+from src.pdf_cache import pdf_text_cache
+from src.program_index import program_index
+
 
 class gtProgramManager:
-    def __init__(self):
-        pass
+    def __init__(self, text_cache=pdf_text_cache, index=program_index):
+        self.text_cache = text_cache
+        self.index = index
 
     def get_program_details(self, program_name):
         base_dir = os.path.dirname(__file__)
         program_folder_path = os.path.join(base_dir,"programs",program_name)
-        
+
         if not os.path.exists(program_folder_path):
             print("program folder does not exist")
             return f"Program {program_name} does not exist."
-        
+
         file_contents = []
 
         for file in os.listdir(program_folder_path):
             if file.endswith(".pdf"):
                 file_path = os.path.join(program_folder_path, file)
-                try: 
-                    reader = PdfReader(file_path)
-                    text = ""
-                    for page in reader.pages:
-                        text += page.extract_text() or ""
+                try:
+                    pages = self.text_cache.get_pages(file_path)
+                    text = "".join(pages)
                     text = text.replace('\n', ' ').replace('\r', '')
                     file_contents.append(text)
                 except Exception as e:
                     print(f"[error occurred] {file}: {e}")
         if not file_contents:
             return f"No Program details found in the program folder: {program_name}"
-        
+
         return file_contents
+
+    def search_program_details(self, program_name: str, query: str, top_k: int = 5, max_chars: int = 4000):
+        """
+        Searches the program documents and returns only the passages most relevant to the question.
+        """
+        try:
+            results = self.index.search(program_name, query, top_k=top_k, max_chars=max_chars)
+        except Exception as e:
+            print(f"[error occurred] {program_name}: {e}")
+            return {"error": str(e)}
+        if results is None:
+            return f"Program {program_name} does not exist."
+        if not results:
+            return f"No passages in {program_name} matched the query: {query}"
+        return results
@@ -0,0 +1,236 @@
+import argparse
+import gzip
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+from src.pdf_cache import pdf_text_cache
+from src.paths import BASE_DIR
+
+PROGRAMS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "programs")
+INDEX_DIR = os.path.join(BASE_DIR, "data", "program_index")
+INDEX_VERSION = 1
+
+CHUNK_WORDS = 120
+CHUNK_OVERLAP = 30
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from has have how i in is it me my of on or
+should that the this to was what when which who will with you your
+""".split())
+
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def chunk_pages(pages, chunk_words=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    """
+    Splits page texts into overlapping word windows. Returns (page_number, text) pairs.
+    """
+    step = max(chunk_words - overlap, 1)
+    chunks = []
+    for page_no, page in enumerate(pages, start=1):
+        words = page.split()
+        for start in range(0, max(len(words) - overlap, 1), step):
+            window = words[start:start + chunk_words]
+            if window:
+                chunks.append((page_no, " ".join(window)))
+    return chunks
+
+
+def valid_program_name(program_name):
+    """
+    A program name comes from the model's tool arguments and must be a single folder name, never a path.
+    """
+    return (
+        isinstance(program_name, str)
+        and program_name not in ("", ".", "..")
+        and "\0" not in program_name
+        and os.path.basename(program_name) == program_name
+        and not (os.altsep and os.altsep in program_name)
+    )
+
+
+def program_pdf_files(program_name, programs_dir=PROGRAMS_DIR):
+    if not valid_program_name(program_name):
+        return None
+    folder = os.path.join(programs_dir, program_name)
+    if not os.path.isdir(folder):
+        return None
+    return sorted(
+        os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(".pdf")
+    )
+
+
+def _source_signature(files):
+    sig = {}
+    for path in files:
+        st = os.stat(path)
+        sig[os.path.basename(path)] = [st.st_size, st.st_mtime_ns]
+    return sig
+
+
+def index_path(program_name, index_dir=INDEX_DIR):
+    if not valid_program_name(program_name):
+        raise ValueError(f"Invalid program name: {program_name!r}")
+    return os.path.join(index_dir, f"{program_name}.json.gz")
+
+
+def build_program_index(program_name, programs_dir=PROGRAMS_DIR, index_dir=INDEX_DIR, text_cache=pdf_text_cache):
+    """
+    Chunks every PDF of a program into passages and writes a BM25 inverted index to disk.
+
+    Postings are stored as flat [passage_id, term_frequency, ...] integer lists
+    in a gzip-compressed JSON file, next to the passages and their lengths.
+    """
+    files = program_pdf_files(program_name, programs_dir)
+    if files is None:
+        raise FileNotFoundError(f"Program folder not found: {program_name}")
+
+    sources, passages, lengths = [], [], []
+    postings = {}
+    for path in files:
+        try:
+            pages = text_cache.get_pages(path)
+        except Exception as e:
+            print(f"[error occurred] {os.path.basename(path)}: {e}")
+            continue
+        source_id = len(sources)
+        sources.append(os.path.basename(path))
+        for page_no, text in chunk_pages(pages):
+            pid = len(passages)
+            tokens = tokenize(text)
+            passages.append([source_id, page_no, text])
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).extend((pid, tf))
+
+    index = {
+        "version": INDEX_VERSION,
+        "program": program_name,
+        "signature": _source_signature(files),
+        "sources": sources,
+        "passages": passages,
+        "lengths": lengths,
+        "postings": postings,
+    }
+    path = index_path(program_name, index_dir)
+    os.makedirs(index_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return index
+
+
+class gtProgramIndex:
+    """
+    Loads per-program BM25 indexes on demand and rebuilds them when the PDFs change.
+    """
+
+    def __init__(self, programs_dir=PROGRAMS_DIR, index_dir=INDEX_DIR, text_cache=pdf_text_cache):
+        self.programs_dir = programs_dir
+        self.index_dir = index_dir
+        self.text_cache = text_cache
+        self._indexes = {}
+        self._lock = threading.Lock()
+        self._program_locks = {}  # program -> lock held while its index is loaded or built
+
+    def get_index(self, program_name):
+        files = program_pdf_files(program_name, self.programs_dir)
+        if files is None:
+            return None
+        signature = _source_signature(files)
+
+        with self._lock:
+            index = self._indexes.get(program_name)
+            if index is not None and index["signature"] == signature:
+                return index
+            program_lock = self._program_locks.setdefault(program_name, threading.Lock())
+
+        # only searches of the same program wait for its build; the others keep using their cached indexes
+        with program_lock:
+            with self._lock:
+                index = self._indexes.get(program_name)
+            if index is None or index["signature"] != signature:
+                index = self._load(program_name)
+                if index is None or index["signature"] != signature:
+                    index = build_program_index(program_name, self.programs_dir, self.index_dir, self.text_cache)
+                index["avgdl"] = sum(index["lengths"]) / max(len(index["lengths"]), 1)
+                with self._lock:
+                    self._indexes[program_name] = index
+        return index
+
+    def search(self, program_name, query, top_k=5, max_chars=4000):
+        """
+        Returns the top-k BM25 passages for a query, stopping once max_chars is reached.
+        """
+        index = self.get_index(program_name)
+        if index is None:
+            return None
+
+        n_docs = len(index["passages"])
+        lengths = index["lengths"]
+        avgdl = index["avgdl"] or 1.0
+        scores = {}
+        for term in set(tokenize(query)):
+            plist = index["postings"].get(term)
+            if not plist:
+                continue
+            df = len(plist) // 2
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for i in range(0, len(plist), 2):
+                pid, tf = plist[i], plist[i + 1]
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[pid] / avgdl)
+                scores[pid] = scores.get(pid, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        results = []
+        used = 0
+        for pid in sorted(scores, key=scores.get, reverse=True)[:top_k]:
+            source_id, page_no, text = index["passages"][pid]
+            if used + len(text) > max_chars:
+                remaining = max_chars - used
+                if remaining < 200:
+                    break
+                text = text[:remaining - 4] + " ..."
+            used += len(text)
+            results.append({
+                "source": index["sources"][source_id],
+                "page": page_no,
+                "score": round(scores[pid], 3),
+                "text": text,
+            })
+        return results
+
+    def _load(self, program_name):
+        try:
+            with gzip.open(index_path(program_name, self.index_dir), "rt", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get("version") != INDEX_VERSION:
+            return None
+        return index
+
+
+program_index = gtProgramIndex()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build BM25 passage indexes for program PDFs.")
+    parser.add_argument("programs", nargs="*", help="program folder names (default: all)")
+    args = parser.parse_args()
+
+    names = args.programs or sorted(
+        d for d in os.listdir(PROGRAMS_DIR) if os.path.isdir(os.path.join(PROGRAMS_DIR, d))
+    )
+    for name in names:
+        index = build_program_index(name)
+        print(f"{name}: {len(index['passages'])} passages, {len(index['postings'])} terms -> {index_path(name)}")
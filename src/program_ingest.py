@@ -0,0 +1,122 @@
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.pdf_cache import extract_pdf_pages, pdf_text_cache
+from src.program_index import PROGRAMS_DIR, program_index, program_pdf_files
+
+
+def _extract_file(file_path):
+    # runs in a worker process
+    start = time.perf_counter()
+    try:
+        pages = extract_pdf_pages(file_path)
+        return file_path, pages, time.perf_counter() - start, None
+    except Exception as e:
+        return file_path, None, time.perf_counter() - start, str(e)
+
+
+def _pool_context():
+    # prewarm runs on a background thread of a process that already has other threads (Gradio, tools);
+    # forking there can copy a lock another thread holds, so workers start from a fresh interpreter
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def list_programs(programs_dir=PROGRAMS_DIR):
+    if not os.path.isdir(programs_dir):
+        return []
+    return sorted(d for d in os.listdir(programs_dir) if os.path.isdir(os.path.join(programs_dir, d)))
+
+
+def ingest_programs(programs_dir=PROGRAMS_DIR, max_workers=None, text_cache=pdf_text_cache, index=program_index):
+    """
+    Extracts every program PDF across a process pool, fills the text cache and builds the passage indexes.
+
+    Returns one timing record per file: {"program", "file", "status", "pages", "seconds"}
+    where status is "cached", "parsed" or "error".
+    """
+    report = []
+    pending = {}
+    programs = list_programs(programs_dir)
+    for program in programs:
+        for path in program_pdf_files(program, programs_dir) or []:
+            start = time.perf_counter()
+            pages = text_cache.lookup(path)
+            if pages is None:
+                pending[path] = program
+                continue
+            report.append({
+                "program": program,
+                "file": os.path.basename(path),
+                "status": "cached",
+                "pages": len(pages),
+                "seconds": time.perf_counter() - start,
+            })
+
+    if pending:
+        workers = min(max_workers or os.cpu_count() or 1, len(pending))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+            futures = [pool.submit(_extract_file, path) for path in pending]
+            for future in as_completed(futures):
+                path, pages, seconds, error = future.result()
+                record = {
+                    "program": pending[path],
+                    "file": os.path.basename(path),
+                    "status": "error" if error else "parsed",
+                    "pages": len(pages) if pages else 0,
+                    "seconds": seconds,
+                }
+                if error:
+                    record["error"] = error
+                else:
+                    text_cache.put_pages(path, pages)
+                report.append(record)
+
+    for program in programs:
+        try:
+            index.get_index(program)
+        except Exception as e:
+            print(f"[error occurred] indexing {program}: {e}")
+    return report
+
+
+def print_report(report):
+    for r in sorted(report, key=lambda r: r["seconds"], reverse=True):
+        line = f"[ingest] {r['program']}/{r['file']}: {r['status']}, {r['pages']} pages, {r['seconds'] * 1000:.1f} ms"
+        if r.get("error"):
+            line += f" ({r['error']})"
+        print(line)
+    parsed = [r for r in report if r["status"] == "parsed"]
+    print(f"[ingest] {len(report)} files, {len(parsed)} parsed, "
+          f"{sum(r['seconds'] for r in parsed):.2f} s total parse time")
+
+
+def start_prewarm(programs_dir=PROGRAMS_DIR, max_workers=None):
+    """
+    Runs ingest_programs in a background daemon thread and returns the thread.
+    """
+    def _run():
+        start = time.perf_counter()
+        try:
+            report = ingest_programs(programs_dir, max_workers)
+        except Exception as e:
+            print(f"[ingest] prewarm failed: {e}")
+            return
+        print_report(report)
+        print(f"[ingest] prewarm finished in {time.perf_counter() - start:.2f} s")
+
+    thread = threading.Thread(target=_run, name="program-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract and index all program PDFs.")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    args = parser.parse_args()
+    print_report(ingest_programs(max_workers=args.workers))
@@ -0,0 +1,156 @@
+from src.db_functions import fetch_rows
+from src.schedule_functions import find_conflicts, load_meetings
+
+MAX_BUNDLE_SIZE = 5
+MAX_BUNDLES = 50
+# candidates the search may try before it returns the bundles found so far
+MAX_SEARCH_STEPS = 100000
+
+# one pass over the semester's offerings (idx_offerings_semester_course), excluding courses
+# the student already took (idx_transcripts_student)
+CANDIDATES_SQL = """
+SELECT co.offering_id, co.course_id, c.course_name, c.credits, co.schedule,
+       p.full_name, co.max_students, co.enrolled_students
+FROM course_offerings co
+JOIN courses c ON c.course_id = co.course_id
+LEFT JOIN professors p ON p.id = co.professor_id
+WHERE co.semester = ?
+  AND co.course_id NOT IN (
+      SELECT taken.course_id
+      FROM transcripts t
+      JOIN course_offerings taken ON taken.offering_id = t.offering_id
+      WHERE t.student_id = ?
+  )
+ORDER BY co.course_id, co.offering_id
+"""
+
+
+def _normalize_semester(semester):
+    # stored as e.g. "Fall 2025"
+    return " ".join(semester.split()).title()
+
+
+def enumerate_bundles(candidates, conflicts, bundle_size, max_bundles, credits=None, max_credits=None, max_steps=MAX_SEARCH_STEPS):
+    """
+    Returns (bundles, complete): up to max_bundles combinations of bundle_size offering ids with distinct
+    courses, no conflicting pair and, with max_credits, at most that many credits in total.
+    complete is False when the search ran out of its max_steps candidates with some left untried.
+
+    candidates: list of (offering_id, course_id) in a stable order.
+    conflicts: set of (id_a, id_b) pairs with id_a < id_b.
+    credits: {offering_id: credits}, needed for max_credits.
+    """
+    bundles = []
+    steps = [0]
+    stopped = [False]
+    credits = credits or {}
+    # the cheapest way to fill the remaining slots, for pruning on the credits left
+    min_credits = min((credits.get(offering_id) or 0 for offering_id, _ in candidates), default=0)
+
+    def compatible(offering_id, course_id, chosen):
+        for other_id, other_course in chosen:
+            if other_course == course_id:
+                return False
+            if (min(offering_id, other_id), max(offering_id, other_id)) in conflicts:
+                return False
+        return True
+
+    def extend(start, chosen, used_credits):
+        if len(chosen) == bundle_size:
+            bundles.append([offering_id for offering_id, _ in chosen])
+            return
+        for i in range(start, len(candidates) - (bundle_size - len(chosen)) + 1):
+            if len(bundles) >= max_bundles:
+                return
+            if steps[0] >= max_steps:
+                stopped[0] = True
+                return
+            steps[0] += 1
+            offering_id, course_id = candidates[i]
+            total = used_credits + (credits.get(offering_id) or 0)
+            if max_credits is not None and total + (bundle_size - len(chosen) - 1) * min_credits > max_credits:
+                continue
+            if compatible(offering_id, course_id, chosen):
+                chosen.append((offering_id, course_id))
+                extend(i + 1, chosen, total)
+                chosen.pop()
+
+    extend(0, [], 0)
+    return bundles, not stopped[0]
+
+
+def recommend_course_bundles(student_id: int, semester: str, bundle_size: int = 3, max_bundles: int = 10, max_credits: int = None):
+    """
+    Lists the offerings a student can still take in a semester (not taken yet, not full) and conflict-free bundles of bundle_size courses.
+    """
+    try:
+        semester = _normalize_semester(semester)
+        bundle_size = max(1, min(int(bundle_size), MAX_BUNDLE_SIZE))
+        max_bundles = max(1, min(int(max_bundles), MAX_BUNDLES))
+        max_credits = None if max_credits is None else int(max_credits)
+        if max_credits is not None and max_credits < 1:
+            return {"error": f"max_credits must be at least 1, got {max_credits}"}
+        rows = fetch_rows(CANDIDATES_SQL, (semester, int(student_id)))["rows"]
+    except Exception as e:
+        return {"error": str(e)}
+
+    candidates, full = [], []
+    for offering_id, course_id, course_name, credits, schedule, professor, max_students, enrolled in rows:
+        if max_students is not None and enrolled is not None and enrolled >= max_students:
+            full.append(course_id)
+            continue
+        candidates.append({
+            "offering_id": offering_id,
+            "course_id": course_id,
+            "course_name": course_name,
+            "credits": credits,
+            "schedule": schedule,
+            "professor": professor,
+            "seats_left": None if max_students is None or enrolled is None else max_students - enrolled,
+        })
+
+    # a course is only "full" if none of its offerings has a seat left
+    open_courses = {c["course_id"] for c in candidates}
+    full = sorted(set(full) - open_courses)
+
+    note = None
+    fits = True
+    if max_credits is not None and candidates:
+        # the cap may not fit bundle_size courses at all; shrink the bundles instead of finding none
+        lightest = min(c["credits"] or 0 for c in candidates)
+        fitting = max_credits // lightest if lightest else bundle_size
+        if fitting == 0:
+            fits = False
+            note = f"Every candidate course has more than max_credits={max_credits} credits, so no combination fits."
+        elif fitting < bundle_size:
+            note = (f"bundle_size was lowered from {bundle_size} to {fitting}: {bundle_size} courses take at least "
+                    f"{bundle_size * lightest} credits, more than max_credits={max_credits}.")
+            bundle_size = fitting
+
+    bundles, complete = [], True
+    if candidates and fits:
+        try:
+            meetings, _ = load_meetings([c["offering_id"] for c in candidates])
+        except Exception as e:
+            return {"error": str(e)}
+        conflicts = set(find_conflicts(meetings))
+        course_of = {c["offering_id"]: c["course_id"] for c in candidates}
+        found, complete = enumerate_bundles(
+            [(c["offering_id"], c["course_id"]) for c in candidates], conflicts, bundle_size, max_bundles,
+            credits={c["offering_id"]: c["credits"] for c in candidates}, max_credits=max_credits,
+        )
+        bundles = [{"offering_ids": ids, "courses": [course_of[i] for i in ids]} for ids in found]
+
+    result = {
+        "student_id": student_id,
+        "semester": semester,
+        "candidates": candidates,
+        "full_offerings": full,
+        "bundle_size": bundle_size,
+        "bundles": bundles,
+        # False when the search was cut short; more bundles may exist
+        "search_complete": complete,
+    }
+    if note:
+        result["note"] = note
+    return result
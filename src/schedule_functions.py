@@ -0,0 +1,204 @@
+import re
+import sqlite3
+
+from src.db_functions import fetch_rows
+
+# ids bound per IN (...) query; older SQLite builds allow at most 999 parameters
+IN_CHUNK_SIZE = 500
+
+DAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+_DAY_ALIASES = {
+    "mon": 0, "monday": 0, "m": 0,
+    "tue": 1, "tues": 1, "tuesday": 1, "t": 1,
+    "wed": 2, "wednesday": 2, "w": 2,
+    "thu": 3, "thur": 3, "thurs": 3, "thursday": 3, "r": 3,
+    "fri": 4, "friday": 4, "f": 4,
+    "sat": 5, "saturday": 5, "s": 5,
+    "sun": 6, "sunday": 6, "u": 6,
+}
+_TIME_RANGE_RE = re.compile(
+    r"(\d{1,2})(?::(\d{2}))?\s*([ap]\.?m\.?)?\s*[-–~]\s*(\d{1,2})(?::(\d{2}))?\s*([ap]\.?m\.?)?",
+    re.IGNORECASE,
+)
+
+MEETING_TIMES_TABLE = """
+CREATE TABLE IF NOT EXISTS meeting_times (
+    offering_id INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    start_minute INTEGER NOT NULL,
+    end_minute INTEGER NOT NULL,
+
+    PRIMARY KEY (offering_id, day, start_minute),
+    FOREIGN KEY (offering_id) REFERENCES course_offerings(offering_id)
+) WITHOUT ROWID
+"""
+
+
+def _to_minute(hour, minute, meridiem):
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem:
+        meridiem = meridiem[0].lower()
+        if meridiem == "p" and hour < 12:
+            hour += 12
+        elif meridiem == "a" and hour == 12:
+            hour = 0
+    return hour * 60 + minute
+
+
+def _parse_days(text):
+    days = []
+    for token in re.findall(r"[A-Za-z]+", text):
+        day = _DAY_ALIASES.get(token.lower())
+        if day is not None:
+            days.append(day)
+        elif token.isupper():
+            # compact codes such as "MWF" or "TR"
+            letters = [_DAY_ALIASES.get(ch.lower()) for ch in token]
+            if None not in letters:
+                days.extend(letters)
+    return sorted(set(days))
+
+
+def parse_schedule(schedule):
+    """
+    Parses schedule text such as "Mon/Wed 12:30 - 13:45" or "TR 2:00pm-3:15pm"
+    into (day, start_minute, end_minute) tuples, with day 0 = Monday.
+    """
+    if not schedule:
+        return []
+    meetings = []
+    # "Mon/Wed 12:30 - 13:45, Fri 09:00 - 09:50" lists several day groups
+    position = 0
+    for match in _TIME_RANGE_RE.finditer(schedule):
+        days = _parse_days(schedule[position:match.start()])
+        position = match.end()
+        start_h, start_m, start_ampm, end_h, end_m, end_ampm = match.groups()
+        start = _to_minute(start_h, start_m, start_ampm or end_ampm)
+        end = _to_minute(end_h, end_m, end_ampm)
+        if end <= start and not start_ampm and end_ampm:
+            # "11-1pm": the start takes the other meridiem
+            start = _to_minute(start_h, start_m, "am" if end_ampm[0].lower() == "p" else "pm")
+        elif end <= start and not start_ampm and not end_ampm and int(end_h) < 12:
+            # "12:30 - 1:45" without meridiems ends in the afternoon
+            end += 12 * 60
+        if end <= start or not days:
+            continue
+        meetings.extend((day, start, end) for day in days)
+    return meetings
+
+
+def format_minute(minute):
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def rebuild_meeting_times(conn):
+    """
+    Re-derives the meeting_times table from course_offerings.schedule. Returns the number of rows written.
+    """
+    conn.execute(MEETING_TIMES_TABLE)
+    conn.execute("DELETE FROM meeting_times")
+    rows = (
+        (offering_id, day, start, end)
+        for offering_id, schedule in conn.execute("SELECT offering_id, schedule FROM course_offerings")
+        for day, start, end in parse_schedule(schedule)
+    )
+    before = conn.total_changes
+    conn.executemany("INSERT OR IGNORE INTO meeting_times (offering_id, day, start_minute, end_minute) VALUES (?, ?, ?, ?)", rows)
+    return conn.total_changes - before
+
+
+def _parse_ids(offering_ids):
+    if isinstance(offering_ids, (int, float)):
+        return [int(offering_ids)]
+    if isinstance(offering_ids, str):
+        offering_ids = re.findall(r"\d+", offering_ids)
+    return sorted({int(i) for i in offering_ids})
+
+
+def find_conflicts(meetings):
+    """
+    Returns every pair of offerings whose meetings overlap, found with a sweep over intervals sorted by (day, start).
+
+    meetings: iterable of (offering_id, day, start_minute, end_minute).
+    Returns {(id_a, id_b): [(day, overlap_start, overlap_end), ...]} with id_a < id_b.
+    """
+    conflicts = {}
+    active = []
+    current_day = None
+    for offering_id, day, start, end in sorted(meetings, key=lambda m: (m[1], m[2], m[3])):
+        if day != current_day:
+            active = []
+            current_day = day
+        active = [m for m in active if m[2] > start]
+        for other_id, _, other_end in active:
+            if other_id != offering_id:
+                pair = (min(offering_id, other_id), max(offering_id, other_id))
+                conflicts.setdefault(pair, []).append((day, start, min(end, other_end)))
+        active.append((offering_id, start, end))
+    return conflicts
+
+
+def fetch_rows_in(sql_template, ids):
+    """
+    Runs sql_template, whose "{ids}" is an IN list, over ids in chunks that stay below SQLite's
+    limit on bound parameters (999 on older builds), and returns all rows.
+    """
+    ids = list(dict.fromkeys(ids))
+    rows = []
+    for start in range(0, len(ids), IN_CHUNK_SIZE):
+        chunk = ids[start:start + IN_CHUNK_SIZE]
+        rows.extend(fetch_rows(sql_template.format(ids=", ".join("?" for _ in chunk)), chunk)["rows"])
+    return rows
+
+
+def load_meetings(ids):
+    """
+    Returns (meetings, courses) for the given offering ids: meeting tuples for find_conflicts
+    and {offering_id: (course_id, schedule)} for the offerings that exist.
+    """
+    offerings = fetch_rows_in("SELECT offering_id, course_id, schedule FROM course_offerings WHERE offering_id IN ({ids})", ids)
+    courses = {offering_id: (course_id, schedule) for offering_id, course_id, schedule in offerings}
+
+    meetings = []
+    try:
+        meetings = fetch_rows_in(
+            "SELECT offering_id, day, start_minute, end_minute FROM meeting_times WHERE offering_id IN ({ids})", ids
+        )
+    except sqlite3.OperationalError:
+        pass  # database created before meeting_times existed
+    # parse the text of offerings that have no normalized rows yet
+    have_rows = {m[0] for m in meetings}
+    for offering_id, (_, schedule) in courses.items():
+        if offering_id not in have_rows:
+            meetings.extend((offering_id, day, start, end) for day, start, end in parse_schedule(schedule))
+    return meetings, courses
+
+
+def check_schedule_conflicts(offering_ids: list):
+    """
+    Checks a set of course offerings for time conflicts and returns every conflicting pair.
+    """
+    try:
+        ids = _parse_ids(offering_ids)
+        if not ids:
+            return {"error": "No offering ids given."}
+        meetings, courses = load_meetings(ids)
+    except Exception as e:
+        return {"error": str(e)}
+
+    conflicts = []
+    for (a, b), overlaps in sorted(find_conflicts(meetings).items()):
+        conflicts.append({
+            "offering_ids": [a, b],
+            "courses": [courses[a][0], courses[b][0]],
+            "overlaps": [f"{DAY_NAMES[day]} {format_minute(start)}-{format_minute(end)}" for day, start, end in overlaps],
+        })
+
+    scheduled = {m[0] for m in meetings}
+    return {
+        "checked": ids,
+        "conflicts": conflicts,
+        "no_conflicts": not conflicts,
+        "not_found": [i for i in ids if i not in courses],
+        "unscheduled": [i for i in ids if i in courses and i not in scheduled],
+    }
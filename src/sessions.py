@@ -0,0 +1,133 @@
+import contextvars
+import threading
+import time
+from collections import OrderedDict
+
+from src.history import estimate_tokens
+
+IDLE_TIMEOUT_SECONDS = 30 * 60
+MAX_SESSIONS = 500
+MAX_TOTAL_TOKENS = 2_000_000
+
+
+class gtSession:
+    """
+    The state of one chat session: its history, the agent that answered last and a context
+    holding per-session values such as the calendar manager.
+    """
+
+    def __init__(self, session_id, agent, context_values=()):
+        self.session_id = session_id
+        self.agent = agent
+        self.messages = []
+        # one turn at a time per session; a second submit waits for the first
+        self.lock = threading.Lock()
+        self.created = self.last_active = time.monotonic()
+        # estimated tokens of messages as of the last gtSessionStore.resize
+        self.tokens = 0
+        self.context = contextvars.copy_context()
+        for var, value in context_values:
+            self.context.run(var.set, value)
+
+    def iterate(self, iterable):
+        """
+        Iterates inside the session's context, so tools run for this session see its context values
+        even when each step of a streaming reply runs on a different thread.
+        """
+        iterator = iter(iterable)
+        while True:
+            try:
+                item = self.context.run(next, iterator)
+            except StopIteration:
+                return
+            yield item
+
+    def size(self):
+        """
+        Recounts the tokens of the history; use the cached tokens where this is too slow.
+        """
+        return sum(estimate_tokens(m) for m in self.messages)
+
+
+class gtSessionStore:
+    """
+    Sessions by id, evicted after idle_timeout seconds without a request and, least recently
+    used first, when there are more than max_sessions or their histories exceed max_total_tokens.
+    Sessions that are answering a request are never evicted. Call resize(session) after changing
+    a session's messages so the running token total stays current.
+    """
+
+    def __init__(self, create_session, idle_timeout=IDLE_TIMEOUT_SECONDS, max_sessions=MAX_SESSIONS, max_total_tokens=MAX_TOTAL_TOKENS):
+        self.create_session = create_session
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.max_total_tokens = max_total_tokens
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_tokens = 0
+        self.stats = {"created": 0, "evicted_idle": 0, "evicted_capacity": 0, "ended": 0}
+
+    def get(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = self.create_session(session_id)
+                self.stats["created"] += 1
+            self._sessions.move_to_end(session_id)
+            session.last_active = time.monotonic()
+            self._evict()
+        return session
+
+    def end(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self._total_tokens -= session.tokens
+                self.stats["ended"] += 1
+
+    def resize(self, session):
+        """
+        Updates the session's token count (one pass over its own history) and the store's total.
+        """
+        tokens = session.size()
+        with self._lock:
+            if self._sessions.get(session.session_id) is session:
+                self._total_tokens += tokens - session.tokens
+            session.tokens = tokens
+
+    def evict(self):
+        with self._lock:
+            self._evict()
+
+    def get_stats(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            stats = dict(self.stats)
+            stats["total_tokens"] = self._total_tokens
+        stats["sessions"] = len(sessions)
+        stats["active"] = sum(1 for s in sessions if s.lock.locked())
+        return stats
+
+    def _evict(self):
+        now = time.monotonic()
+        # sessions are kept least recently used first, so the idle ones are at the front
+        for session_id, session in list(self._sessions.items()):
+            if now - session.last_active <= self.idle_timeout:
+                break
+            if not session.lock.locked():
+                self._remove(session_id)
+                self.stats["evicted_idle"] += 1
+
+        if len(self._sessions) <= self.max_sessions and self._total_tokens <= self.max_total_tokens:
+            return
+        # oldest first; the session that was just touched is last and is kept
+        for session_id, session in list(self._sessions.items())[:-1]:
+            if len(self._sessions) <= self.max_sessions and self._total_tokens <= self.max_total_tokens:
+                break
+            if session.lock.locked():
+                continue
+            self._remove(session_id)
+            self.stats["evicted_capacity"] += 1
+
+    def _remove(self, session_id):
+        self._total_tokens -= self._sessions.pop(session_id).tokens
@@ -1,12 +1,16 @@
+import argparse
+import csv
+import json
+import os
 import sqlite3
-import pandas as pd
+import time
 
+from src.db_functions import DB_PATH
+from src.schedule_functions import rebuild_meeting_times
 
-conn = sqlite3.connect("university.db")
-
-c = conn.cursor()
-
-c.execute("""
+# tables in load order (parents before children)
+TABLES = {
+    "students": """
 CREATE TABLE IF NOT EXISTS students (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     username TEXT NOT NULL UNIQUE,
@@ -21,17 +25,43 @@ CREATE TABLE IF NOT EXISTS students (
     gpa REAL,
     credits_completed INTEGER DEFAULT 0
 )
-""")
-
-c.execute("""
-INSERT INTO students (id, username, email, full_name, program, specialization, gpa, semester_enrolled, credits_completed) VALUES (1, 'lea07','hyunjuji0819@gmail.com','Lea Ji', 'ms-cs', 'Machine Learning', 4.0, 'Fall 2024', 15),
-(2, 'woohyun12','ji819kr@gmail.com','Woohyun Noh', 'ms-cs', 'Robotics', 4.0, 'Fall 2024', 18)
-""")
-
-conn.commit()
+""",
+    "professors": """
+CREATE TABLE IF NOT EXISTS professors (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    full_name TEXT NOT NULL,
+    affiliation TEXT NOT NULL,
+    title TEXT NOT NULL,
+    office TEXT
+)
+""",
+    "courses": """
+CREATE TABLE IF NOT EXISTS courses (
+    course_id TEXT PRIMARY KEY,
+    course_name TEXT NOT NULL,
+    department TEXT NOT NULL,
+    credits INTEGER NOT NULL,
+    description TEXT
+)
+""",
+    "course_offerings": """
+CREATE TABLE IF NOT EXISTS course_offerings (
+    offering_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    course_id TEXT NOT NULL,
+    professor_id INTEGER NOT NULL,
+    semester TEXT NOT NULL,
+    schedule TEXT,
+    location TEXT,
+    max_students INTEGER,
+    enrolled_students INTEGER,
 
-c.execute("""
-CREATE TABLE transcripts (
+    FOREIGN KEY (course_id) REFERENCES courses(course_id),
+    FOREIGN KEY (professor_id) REFERENCES professors(id)
+)
+""",
+    "transcripts": """
+CREATE TABLE IF NOT EXISTS transcripts (
 id INTEGER PRIMARY KEY AUTOINCREMENT,
 student_id INTEGER NOT NULL,
 offering_id INTEGER NOT NULL,
@@ -40,33 +70,45 @@ grade TEXT NOT NULL,
 FOREIGN KEY (student_id) REFERENCES students(id),
 FOREIGN KEY (offering_id) REFERENCES course_offerings(offering_id)
 )
-""")
-
-
-c.execute("""
-INSERT INTO transcripts (student_id, offering_id, grade) VALUES (1, 1, 'A'),
-(1, 2, 'A'),
-(1, 3, 'A'),
-(1, 6, 'A'),
-(1, 7, 'A'),
-(2, 1, 'A'),
-(2, 4, 'A'),
-(2, 5, 'A'),
-(2, 8, 'A'),
-(2, 9, 'A'),
-(2, 10, 'A')
-""")
-
-c.execute("""
-CREATE TABLE IF NOT EXISTS professors (
-    id INTEGER PRIMARY KEY,
-    username TEXT NOT NULL UNIQUE,
-    full_name TEXT NOT NULL,
-    affiliation TEXT NOT NULL,
-    title TEXT NOT NULL,
-    office TEXT
-)
-""")
+""",
+}
+
+COLUMNS = {
+    "students": ["id", "username", "password_hash", "email", "full_name", "program", "specialization",
+                 "semester_enrolled", "gpa", "credits_completed"],
+    "professors": ["id", "username", "full_name", "affiliation", "title", "office"],
+    "courses": ["course_id", "course_name", "department", "credits", "description"],
+    "course_offerings": ["offering_id", "course_id", "professor_id", "semester", "schedule", "location",
+                         "max_students", "enrolled_students"],
+    "transcripts": ["id", "student_id", "offering_id", "grade"],
+}
+
+# index -> (table, CREATE statement); dropped and rebuilt only around a full load into an empty table
+INDEXES = {
+    "idx_transcripts_student": ("transcripts", "CREATE INDEX IF NOT EXISTS idx_transcripts_student ON transcripts(student_id)"),
+    "idx_offerings_semester_course": ("course_offerings", "CREATE INDEX IF NOT EXISTS idx_offerings_semester_course ON course_offerings(semester, course_id)"),
+    "idx_offerings_professor": ("course_offerings", "CREATE INDEX IF NOT EXISTS idx_offerings_professor ON course_offerings(professor_id)"),
+}
+
+
+students = [
+    (1, 'lea07', None, 'hyunjuji0819@gmail.com', 'Lea Ji', 'ms-cs', 'Machine Learning', 'Fall 2024', 4.0, 15),
+    (2, 'woohyun12', None, 'ji819kr@gmail.com', 'Woohyun Noh', 'ms-cs', 'Robotics', 'Fall 2024', 4.0, 18),
+]
+
+transcripts = [
+    (1, 1, 1, 'A'),
+    (2, 1, 2, 'A'),
+    (3, 1, 3, 'A'),
+    (4, 1, 6, 'A'),
+    (5, 1, 7, 'A'),
+    (6, 2, 1, 'A'),
+    (7, 2, 4, 'A'),
+    (8, 2, 5, 'A'),
+    (9, 2, 8, 'A'),
+    (10, 2, 9, 'A'),
+    (11, 2, 10, 'A'),
+]
 
 professors = [
     (1, "mahdir", "Mahdi Roozbahani", "School of Computational Science and Engineering", "lecturer", None),
@@ -87,21 +129,6 @@ professors = [
     (16, "wenke.lee", "Wenke Lee", "School of Computer Science", "Professor", None)
 ]
 
-c.executemany("""
-INSERT INTO professors (id, username, full_name, affiliation, title, office)
-VALUES (?, ?, ?, ?, ?, ?)
-""", professors)
-
-c.execute("""
-CREATE TABLE IF NOT EXISTS courses (
-    course_id TEXT PRIMARY KEY,
-    course_name TEXT NOT NULL,
-    department TEXT NOT NULL,
-    credits INTEGER NOT NULL,
-    description TEXT
-)
-""")
-
 courses = {
     "CS6515": ("CS6515", "Introduction to Graduate Algorithms", "Computer Science", 3,
                "Advanced study of algorithm design and analysis techniques."),
@@ -137,80 +164,160 @@ courses = {
                "Introduction to information security concepts and techniques."),
 }
 
-c.executemany("""
-INSERT OR IGNORE INTO courses (course_id, course_name, department, credits, description)
-VALUES (?, ?, ?, ?, ?)
-""", courses.values())
-
-c.execute("""
-CREATE TABLE IF NOT EXISTS course_offerings (
-    offering_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    course_id TEXT NOT NULL,
-    professor_id INTEGER NOT NULL,
-    semester TEXT NOT NULL,
-    schedule TEXT,
-    location TEXT,
-    max_students INTEGER,
-    enrolled_students INTEGER,
-
-    FOREIGN KEY (course_id) REFERENCES courses(course_id),
-    FOREIGN KEY (professor_id) REFERENCES professors(id)
-)
-""")
-
-
 course_offerings = [
-    ("CS7641", 1, "Fall 2024", "Mon/Wed 12:30 - 13:45", "Scheller College of Business 100", 315, 315),
-    ("CS7651", 3, "Fall 2024", "Tue/Thu 17:00 - 18:15", "Scheller College of Business 202", 50, 49),
-    ("CS6730", 2, "Fall 2024", "Tue/Thu 14:00 - 15:15", "Instructional Center 211", 110, 100),
-    ("CS7496", 7, "Fall 2024", "Mon/Wed/Fri 11:00 - 11:50", "Scheller College of Business 300", 42, 41),
-    ("CS6476", 10, "Fall 2024", "Tue/Thu 11:00 - 12:15", "College of Computing 16", 239, 239),
-
-    ("CS6476", 4, "Spring 2025", "Mon/Wed 15:30 - 16:45", "College of Computing 16", 250, 246),
-    ("CS7637", 5, "Spring 2025", "Mon/Wed 14:00 - 15:15", "Scheller College of Business 300", 76, 73),
-    ("CS7648", 6, "Spring 2025", "Mon/Wed 09:30 - 10:45", "Skiles 254", 30, 26),
-    ("CS8803-DRL", 7, "Spring 2025", "Tue/Thu 11:00 - 12:15", "Molecular Sciences and Engr G011", 150, 136),
-    ("CS7631", 9, "Spring 2025", "Mon/Wed 14:00 - 15:15", "Scheller College of Business 223", 50, 48),
-
-    ("CS6515", 8, "Fall 2025", "Tue/Thu 15:30 - 16:45", "Clough UG Learning Commons 152", 180, 150),
-    ("CS7633", 11, "Fall 2025", "Mon/Wed 14:00 - 15:15", "Instructional Center 109", 60, 48),
-    ("CS6601", 12, "Fall 2025", "Tue/Thu 14:00 - 15:15", "Howey Physics L1", 240, 160),
-    ("CS7650", 13, "Fall 2025", "Mon/Wed 14:00 - 15:15", "Howey Physics L3", 130, 129),
-    ("CSE6140", 14, "Fall 2025", "Mon/Wed 11:00 - 12:15", "Paper Tricentennial 109", 25, 20),
-    ("CS7643", 15, "Fall 2025", "Mon/Wed 15:30 - 16:45", "Clough UG Learning Commons 144", 150, 149),
-    ("CS6035", 16, "Fall 2025", "Tue/Thu 14:00 - 15:15", "Scheller College of Business 300", 120, 18)
+    (1, "CS7641", 1, "Fall 2024", "Mon/Wed 12:30 - 13:45", "Scheller College of Business 100", 315, 315),
+    (2, "CS7651", 3, "Fall 2024", "Tue/Thu 17:00 - 18:15", "Scheller College of Business 202", 50, 49),
+    (3, "CS6730", 2, "Fall 2024", "Tue/Thu 14:00 - 15:15", "Instructional Center 211", 110, 100),
+    (4, "CS7496", 7, "Fall 2024", "Mon/Wed/Fri 11:00 - 11:50", "Scheller College of Business 300", 42, 41),
+    (5, "CS6476", 10, "Fall 2024", "Tue/Thu 11:00 - 12:15", "College of Computing 16", 239, 239),
+
+    (6, "CS6476", 4, "Spring 2025", "Mon/Wed 15:30 - 16:45", "College of Computing 16", 250, 246),
+    (7, "CS7637", 5, "Spring 2025", "Mon/Wed 14:00 - 15:15", "Scheller College of Business 300", 76, 73),
+    (8, "CS7648", 6, "Spring 2025", "Mon/Wed 09:30 - 10:45", "Skiles 254", 30, 26),
+    (9, "CS8803-DRL", 7, "Spring 2025", "Tue/Thu 11:00 - 12:15", "Molecular Sciences and Engr G011", 150, 136),
+    (10, "CS7631", 9, "Spring 2025", "Mon/Wed 14:00 - 15:15", "Scheller College of Business 223", 50, 48),
+
+    (11, "CS6515", 8, "Fall 2025", "Tue/Thu 15:30 - 16:45", "Clough UG Learning Commons 152", 180, 150),
+    (12, "CS7633", 11, "Fall 2025", "Mon/Wed 14:00 - 15:15", "Instructional Center 109", 60, 48),
+    (13, "CS6601", 12, "Fall 2025", "Tue/Thu 14:00 - 15:15", "Howey Physics L1", 240, 160),
+    (14, "CS7650", 13, "Fall 2025", "Mon/Wed 14:00 - 15:15", "Howey Physics L3", 130, 129),
+    (15, "CSE6140", 14, "Fall 2025", "Mon/Wed 11:00 - 12:15", "Paper Tricentennial 109", 25, 20),
+    (16, "CS7643", 15, "Fall 2025", "Mon/Wed 15:30 - 16:45", "Clough UG Learning Commons 144", 150, 149),
+    (17, "CS6035", 16, "Fall 2025", "Tue/Thu 14:00 - 15:15", "Scheller College of Business 300", 120, 18)
 ]
 
+SEED_DATA = {
+    "students": students,
+    "professors": professors,
+    "courses": list(courses.values()),
+    "course_offerings": course_offerings,
+    "transcripts": transcripts,
+}
 
-c.executemany("""
-INSERT INTO course_offerings (course_id, professor_id, semester, schedule, location, max_students, enrolled_students)
-VALUES (?, ?, ?, ?, ?, ?, ?)
-""", course_offerings)
-
-# df = pd.read_sql_query("SELECT * FROM students", conn)
-# print(df)
-
-# df = pd.read_sql_query("SELECT * FROM transcripts", conn)
-# print(df)
-
-# df = pd.read_sql_query("SELECT * FROM professors", conn)
-# print(df)
-
-# df = pd.read_sql_query("SELECT * FROM courses", conn)
-# print(df)
-
-# df = pd.read_sql_query("SELECT * FROM course_offerings", conn)
-# print(df)
-
-# df = pd.read_sql_query("""
-# SELECT c.*
-# FROM courses c
-# JOIN course_offerings co ON c.course_id = co.course_id
-# JOIN transcripts t ON co.offering_id = t.offering_id
-# JOIN students s ON t.student_id = s.id
-# WHERE s.full_name = 'Lea Ji'
-# """, conn)
-# print(df)
 
-conn.commit()
-conn.close()
\ No newline at end of file
+def read_table_file(path, columns):
+    """
+    Streams rows from a CSV (with header), JSON array or JSON Lines file as tuples in column order.
+    Missing columns and empty CSV cells become NULL.
+    """
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for record in csv.DictReader(f):
+                yield tuple(record.get(col) or None for col in columns)
+    elif path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield tuple(record.get(col) for col in columns)
+    else:
+        with open(path, encoding="utf-8") as f:
+            for record in json.load(f):
+                yield tuple(record.get(col) for col in columns)
+
+
+def find_table_files(import_dir):
+    """
+    Returns {table: path} for the <table>.csv / .jsonl / .json files found in import_dir.
+    """
+    found = {}
+    for table in TABLES:
+        for ext in (".csv", ".jsonl", ".json"):
+            path = os.path.join(import_dir, table + ext)
+            if os.path.exists(path):
+                found[table] = path
+                break
+    return found
+
+
+def insert_rows(conn, table, rows):
+    """
+    Upserts rows by primary key (the first column). A row that collides with another row on a
+    UNIQUE column such as username raises IntegrityError instead of replacing that row.
+    """
+    columns = COLUMNS[table]
+    placeholders = ", ".join("?" for _ in columns)
+    updates = ", ".join(f"{col} = excluded.{col}" for col in columns[1:])
+    before = conn.total_changes
+    conn.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+        f"ON CONFLICT({columns[0]}) DO UPDATE SET {updates}",
+        rows,
+    )
+    return conn.total_changes - before
+
+
+def bulk_load(db_path=DB_PATH, import_dir=None, seed=True, tables=None):
+    """
+    Creates the schema if needed and (re)loads seed data, <table>.csv|.json files and/or
+    in-memory rows ({table: [row tuples]}) in one transaction.
+    Schedules are parsed into the meeting_times table whenever course_offerings is loaded.
+
+    Loading is idempotent for rows with ids: they are upserted by primary key. The secondary
+    indexes of a table loaded from empty are built once after the load; loads into tables that
+    already have rows keep them. ANALYZE refreshes the query planner statistics.
+    """
+    sources = {}
+    if seed:
+        sources.update({table: rows for table, rows in SEED_DATA.items()})
+    if import_dir:
+        files = find_table_files(import_dir)
+        if not files:
+            raise FileNotFoundError(f"No <table>.csv/.jsonl/.json files found in {import_dir}")
+        for table, path in files.items():
+            sources[table] = path
+    if tables:
+        sources.update(tables)
+
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    counts = {}
+    try:
+        # journal_mode is stored in the file: the read-only query pool gets WAL without ever writing
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -200000")
+
+        for create_sql in TABLES.values():
+            conn.execute(create_sql)
+
+        conn.execute("BEGIN")
+        try:
+            empty = {table for table in sources if conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None}
+            # on a full load, maintaining secondary indexes row by row is slower than building them once
+            rebuilt = {name: sql for name, (table, sql) in INDEXES.items() if table in empty}
+            for name, (table, sql) in INDEXES.items():
+                conn.execute(f"DROP INDEX IF EXISTS {name}" if name in rebuilt else sql)
+            for table in TABLES:
+                if table not in sources:
+                    continue
+                source = sources[table]
+                start = time.perf_counter()
+                rows = source if isinstance(source, list) else read_table_file(source, COLUMNS[table])
+                counts[table] = insert_rows(conn, table, rows)
+                print(f"[set_db] {table}: {counts[table]} rows in {time.perf_counter() - start:.2f} s")
+            if "course_offerings" in sources:
+                start = time.perf_counter()
+                counts["meeting_times"] = rebuild_meeting_times(conn)
+                print(f"[set_db] meeting_times: {counts['meeting_times']} rows in {time.perf_counter() - start:.2f} s")
+            for create_index in rebuilt.values():
+                conn.execute(create_index)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create university.db and load seed data or bulk CSV/JSON exports.")
+    parser.add_argument("--db", default=DB_PATH, help="path of the SQLite database (default: data/university.db)")
+    parser.add_argument("--import-dir", help="directory with <table>.csv, <table>.jsonl or <table>.json files")
+    parser.add_argument("--no-seed", action="store_true", help="do not load the built-in sample rows")
+    args = parser.parse_args()
+    bulk_load(args.db, import_dir=args.import_dir, seed=not args.no_seed)
@@ -1,9 +1,10 @@
+import uuid
+
 import streamlit as st
-from openai import AzureOpenAI
 from dotenv import load_dotenv
-import os
-import shelve
-from src.main import run_full_turn, triage_agent
+from app import calendar_agent, db_agent, program_agent, run_full_turn_stream, triage_agent
+from src.conversation_store import conversation_store
+from src.history import message_to_dict
 
 load_dotenv()
 
@@ -12,13 +13,15 @@ st.title("Chatbot Test")
 user_emj = "👤"
 bot_emj = "🤖"
 
-def load_chat_history():
-    with shelve.open("chat_hisory") as db:
-        return db.get("messages",[])
-    
-def save_chat_history(messages):
-    with shelve.open("chat_history") as db:
-        db["messages"] = messages
+AGENTS = {agent.name: agent for agent in (triage_agent, program_agent, calendar_agent, db_agent)}
+
+# the session id is kept in the URL, so reloading the page reloads the conversation
+if "session" not in st.query_params:
+    st.query_params["session"] = uuid.uuid4().hex
+session_id = st.query_params["session"]
+
+# deletes cleared and trimmed histories in the background; started once per process
+conversation_store.start_compaction()
 
 def extract_role_content(message):
     """Return (role, content) regardless of message object type."""
@@ -28,40 +31,62 @@ def extract_role_content(message):
         return message.get("role"), message.get("content")
 
 if "messages" not in st.session_state:
-    st.session_state.messages = load_chat_history()
+    # only the last turns are loaded; older ones on request
+    st.session_state.messages, st.session_state.history_cursor = conversation_store.tail(session_id)
 
 if "current_agent" not in st.session_state:
-    st.session_state.current_agent = triage_agent
+    st.session_state.current_agent = AGENTS.get(conversation_store.last_agent(session_id), triage_agent)
 
 with st.sidebar:
+    if st.session_state.history_cursor is not None and st.button("Load earlier messages"):
+        older, st.session_state.history_cursor = conversation_store.tail(session_id, before=st.session_state.history_cursor)
+        st.session_state.messages = older + st.session_state.messages
     if st.button("Delete chat history"):
         st.session_state.messages = []
-        save_chat_history([])
+        st.session_state.history_cursor = None
+        st.session_state.current_agent = triage_agent
+        conversation_store.clear(session_id)
 
 for message in st.session_state.messages:
     role, content = extract_role_content(message)
     avatar = user_emj if role == "user" else bot_emj
-    if role != "tool":
+    if role != "tool" and content:
         with st.chat_message(role, avatar=avatar):
             st.markdown(content)
 
 if prompt := st.chat_input("How can I help?"):
-    st.session_state.messages.append({"role":"user", "content": prompt})
+    user_message = {"role":"user", "content": prompt}
+    st.session_state.messages.append(user_message)
     with st.chat_message("user", avatar=user_emj):
         st.markdown(prompt)
 
     with st.chat_message("assistant", avatar = bot_emj):
-        response = run_full_turn(
+        placeholder = st.empty()
+        status = st.empty()
+        text = ""
+        response = None
+        for event in run_full_turn_stream(
             st.session_state.current_agent,
             st.session_state.messages
-        )
-        for msg in response.messages:
-            role, content = extract_role_content(msg)
-            if role == "assistant":
-                st.markdown(content)
-            # Store as plain dict for consistency
-            st.session_state.messages.append({"role": role, "content": content})
+        ):
+            if event["type"] == "text":
+                text += event["delta"]
+                placeholder.markdown(text + "▌")
+            elif event["type"] == "tool_call":
+                if text:
+                    text += "\n\n"
+                status.caption(f"{event['agent']} is running {event['name']}...")
+            elif event["type"] == "handoff":
+                status.caption(f"Transferred to {event['agent']}...")
+            elif event["type"] == "done":
+                response = event["response"]
+        status.empty()
+        placeholder.markdown(text)
 
+        # plain dicts, with tool calls kept so the history stays valid for the next model call
+        new_messages = [message_to_dict(msg) for msg in response.messages]
+        st.session_state.messages.extend(new_messages)
         st.session_state.current_agent = response.agent
 
-    save_chat_history(st.session_state.messages)
\ No newline at end of file
+    # only this turn's messages are written
+    conversation_store.append(session_id, [user_message] + new_messages, response.agent.name)
\ No newline at end of file
@@ -0,0 +1,182 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+
+from src.history import message_field
+
+# spans are kept in memory only unless TRACE_FILE names a JSONL file to append them to
+TRACE_PATH = os.path.expanduser(os.getenv("TRACE_FILE", "")) or None
+TRACE_MAX_BYTES = 10 * 1024 * 1024
+TRACE_BACKUP_COUNT = 3
+# durations kept per span kind for the percentiles
+STATS_WINDOW = 1000
+
+# list that spans finished in the current context are also appended to (see gtTracer.collect)
+_collected_spans = ContextVar("collected_spans", default=None)
+
+
+def payload_chars(messages):
+    """
+    Characters of content and tool-call arguments in a list of chat messages.
+    """
+    chars = 0
+    for message in messages:
+        chars += len(message_field(message, "content") or "")
+        for tool_call in message_field(message, "tool_calls") or []:
+            chars += len(message_field(message_field(tool_call, "function"), "arguments") or "")
+    return chars
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class gtTracer:
+    """
+    Records spans for model calls, tool calls and handoffs: wall time, token usage and payload sizes.
+    Spans are appended to a rotating JSONL file and summarized as p50/p95 latencies per kind and name.
+    """
+
+    def __init__(self, path=TRACE_PATH, max_bytes=TRACE_MAX_BYTES, backup_count=TRACE_BACKUP_COUNT,
+                 window=STATS_WINDOW, debug=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.window = window
+        self.debug_enabled = debug
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._counts = {}
+        self._logger = None
+
+    def new_turn_id(self):
+        return uuid.uuid4().hex[:12]
+
+    @contextmanager
+    def span(self, kind, turn_id=None, **attrs):
+        """
+        Times the enclosed block. Yields a dict the caller can add attributes to, such as token counts.
+        """
+        span = dict(attrs)
+        started_at = time.time()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = repr(e)
+            raise
+        finally:
+            if error is not None:
+                span["error"] = error
+            self._finish(kind, turn_id, started_at, (time.perf_counter() - start) * 1000, span)
+
+    def event(self, kind, turn_id=None, **attrs):
+        """
+        Records an instant span, e.g. a handoff.
+        """
+        self._finish(kind, turn_id, time.time(), 0.0, attrs)
+
+    @contextmanager
+    def collect(self):
+        """
+        Yields a list that receives every span finished in the enclosed block, including those of
+        tools running on other threads for it, e.g. to report the cost of one conversation.
+        """
+        spans = []
+        token = _collected_spans.set(spans)
+        try:
+            yield spans
+        finally:
+            _collected_spans.reset(token)
+
+    def debug(self, label, payload):
+        """
+        Prints a payload only when debug dumps are turned on (TRACE_DEBUG=1).
+        """
+        if self.debug_enabled:
+            print(f"[trace] {label}: {payload}")
+
+    def get_stats(self):
+        with self._lock:
+            durations = {key: sorted(values) for key, values in self._durations.items()}
+            counts = {key: dict(c) for key, c in self._counts.items()}
+        stats = {}
+        for key, values in durations.items():
+            stats[key] = {
+                **counts[key],
+                "p50_ms": round(_percentile(values, 0.50), 2),
+                "p95_ms": round(_percentile(values, 0.95), 2),
+                "max_ms": round(values[-1], 2) if values else 0.0,
+            }
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._counts.clear()
+
+    def _finish(self, kind, turn_id, started_at, elapsed_ms, attrs):
+        keys = [kind]
+        if attrs.get("name"):
+            keys.append(f"{kind}:{attrs['name']}")
+        with self._lock:
+            for key in keys:
+                self._durations.setdefault(key, deque(maxlen=self.window)).append(elapsed_ms)
+                counts = self._counts.setdefault(key, {"count": 0, "errors": 0})
+                counts["count"] += 1
+                if "error" in attrs:
+                    counts["errors"] += 1
+        collected = _collected_spans.get()
+        if self.path or collected is not None:
+            record = {"ts": round(started_at, 3), "turn_id": turn_id, "kind": kind, "ms": round(elapsed_ms, 2), **attrs}
+            if collected is not None:
+                collected.append(record)
+            if self.path:
+                self._write(json.dumps(record, ensure_ascii=False, default=str))
+
+    def _write(self, line):
+        logger = self._logger
+        if logger is None:
+            with self._lock:
+                if self._logger is None:
+                    try:
+                        self._logger = self._open_logger()
+                    except OSError as e:
+                        print(f"[trace] could not open {self.path}: {e}")
+                        self.path = None
+                        return
+                logger = self._logger
+        logger.info(line)
+
+    def _open_logger(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # the handler does the locking and rotation; one logger per file
+        logger = logging.getLogger(f"gt.trace.{os.path.abspath(self.path)}")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        if not logger.handlers:
+            handler = RotatingFileHandler(self.path, maxBytes=self.max_bytes, backupCount=self.backup_count, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        return logger
+
+
+tracer = gtTracer(debug=os.getenv("TRACE_DEBUG", "0") == "1")
+
+
+def get_trace_stats():
+    """
+    Returns count, errors and p50/p95/max milliseconds per span kind (e.g. "llm_call") and per kind and name (e.g. "tool_call:query_university_db").
+    """
+    return tracer.get_stats()
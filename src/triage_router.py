@@ -0,0 +1,233 @@
+import argparse
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+from src.paths import BASE_DIR
+
+MODEL_PATH = os.path.join(BASE_DIR, "data", "triage_model.json")
+MODEL_VERSION = 1
+
+LABELS = ("program", "calendar", "db")
+MIN_SIMILARITY = 0.25
+MIN_MARGIN = 0.1
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("""
+a an and are as at be by can could do does for from has have how i in is it me of on or
+please should that the this to was what when which who will with would you your
+""".split())
+_TRANSFER_RE = re.compile(r"^transfer_to_(\w+?)_agent$")
+
+# a message matching rules of exactly one label is routed without asking the model
+RULES = {
+    "calendar": [
+        r"\bcalendar\b", r"\b(add|create|schedule|put|delete|remove|cancel)\b.{0,40}\b(event|meeting|reminder|appointment)s?\b",
+        r"\b(events?|reminders?|appointments?)\b.{0,30}\b(today|tomorrow|this week|next week)\b",
+        r"\bgoogle calendar\b", r"\bremind me\b",
+    ],
+    "program": [
+        r"\brecommend\w*\b", r"\b(degree|program|graduation|specialization|concentration)\b.{0,40}\b(requirement|require|rule|policy|credit)s?\b",
+        r"\bwhat (courses|classes) should i take\b", r"\belectives?\b", r"\b(core|required) (courses|classes)\b",
+        r"\bcourse (plan|bundle|load)\b", r"\bthesis\b", r"\bcan i graduate\b",
+    ],
+    "db": [
+        r"\b(my )?gpa\b", r"\btranscripts?\b", r"\bmy grades?\b", r"\bcredits (completed|earned)\b",
+        r"\bwho (teaches|is teaching)\b", r"\b(professor|instructor)s?\b.{0,30}\b(office|email|title)\b",
+        r"\b(seats?|enrollment|enrolled|capacity)\b", r"\bwhere is\b.{0,30}\b(class|course|lecture)\b",
+        r"\bwhen (does|is)\b.{0,40}\b(meet|offered|taught)\b", r"\bwhich semesters?\b.{0,30}\boffered\b",
+    ],
+}
+_COMPILED_RULES = {label: [re.compile(p, re.IGNORECASE) for p in patterns] for label, patterns in RULES.items()}
+
+# used when no model has been trained from logged conversations yet
+SEED_EXAMPLES = [
+    ("program", "what courses should i take next semester"),
+    ("program", "recommend courses for my specialization"),
+    ("program", "what are the degree requirements for ms cs"),
+    ("program", "how many electives do i need to graduate"),
+    ("program", "which courses count toward the machine learning specialization"),
+    ("program", "can i take a thesis option in my program"),
+    ("program", "plan my courses for fall"),
+    ("calendar", "add my class schedule to my calendar"),
+    ("calendar", "create an event for my exam on friday"),
+    ("calendar", "delete the meeting tomorrow from my calendar"),
+    ("calendar", "what events do i have this week"),
+    ("calendar", "remind me about office hours"),
+    ("calendar", "put the study group on my google calendar"),
+    ("db", "what is my gpa"),
+    ("db", "show my transcript"),
+    ("db", "which courses have i taken"),
+    ("db", "who teaches cs 6200 this semester"),
+    ("db", "how many seats are left in cs 7641"),
+    ("db", "when does cs 6250 meet"),
+    ("db", "what is professor smith's office"),
+    ("db", "how many credits have i completed"),
+]
+
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def _tf(tokens):
+    counts = Counter(tokens)
+    return {term: 1 + math.log(n) for term, n in counts.items()}
+
+
+def _normalize(vector):
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return {t: v / norm for t, v in vector.items()} if norm else {}
+
+
+def train_model(examples):
+    """
+    Trains a TF-IDF nearest-centroid model from (label, text) pairs.
+    """
+    examples = [(label, tokenize(text)) for label, text in examples if label in LABELS]
+    df = Counter(term for _, tokens in examples for term in set(tokens))
+    n = len(examples)
+    idf = {term: math.log((1 + n) / (1 + count)) + 1 for term, count in df.items()}
+
+    centroids = {}
+    counts = Counter()
+    for label, tokens in examples:
+        vector = _normalize({t: w * idf[t] for t, w in _tf(tokens).items()})
+        centroid = centroids.setdefault(label, {})
+        for term, weight in vector.items():
+            centroid[term] = centroid.get(term, 0.0) + weight
+        counts[label] += 1
+    return {
+        "version": MODEL_VERSION,
+        "examples": dict(counts),
+        "idf": idf,
+        "centroids": {label: _normalize(vector) for label, vector in centroids.items()},
+    }
+
+
+def examples_from_conversations(path):
+    """
+    Reads training examples from a JSONL file. Each line is either {"text": ..., "agent": label}
+    or a logged conversation {"messages": [...]}, where a user message followed by a
+    transfer_to_<label>_agent tool call becomes an example for that label.
+    """
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "text" in record:
+                examples.append((record.get("agent"), record["text"]))
+                continue
+            user_text = None
+            for message in record.get("messages", []):
+                if message.get("role") == "user":
+                    user_text = message.get("content")
+                    continue
+                for tool_call in message.get("tool_calls") or []:
+                    match = _TRANSFER_RE.match(tool_call.get("function", {}).get("name", ""))
+                    if match and user_text and match.group(1) in LABELS:
+                        examples.append((match.group(1), user_text))
+                        user_text = None
+    return examples
+
+
+class gtTriageRouter:
+    """
+    Routes a user message to program, calendar or db without a model call when a keyword rule matches.
+    The TF-IDF model only chooses between labels whose rules all matched; it never routes a message
+    no rule recognizes. Returns None when the triage agent's model has to decide.
+    """
+
+    def __init__(self, model_path=MODEL_PATH, min_similarity=MIN_SIMILARITY, min_margin=MIN_MARGIN):
+        self.model_path = model_path
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self._model = None
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def model(self):
+        with self._lock:
+            if self._model is None:
+                self._model = self._load() or train_model(SEED_EXAMPLES)
+            return self._model
+
+    def rule_labels(self, text):
+        return {label for label, patterns in _COMPILED_RULES.items() if any(p.search(text) for p in patterns)}
+
+    def classify(self, text):
+        """
+        Returns (label, cosine similarity, margin over the runner-up) from the TF-IDF model.
+        """
+        model = self.model()
+        idf = model["idf"]
+        vector = _normalize({t: w * idf[t] for t, w in _tf(tokenize(text)).items() if t in idf})
+        scores = sorted(
+            ((sum(w * centroid.get(t, 0.0) for t, w in vector.items()), label) for label, centroid in model["centroids"].items()),
+            reverse=True,
+        )
+        if not scores:
+            return None, 0.0, 0.0
+        best, label = scores[0]
+        runner_up = scores[1][0] if len(scores) > 1 else 0.0
+        return label, best, best - runner_up
+
+    def route(self, text):
+        if not text or not text.strip():
+            return None
+        matched = self.rule_labels(text)
+        if len(matched) == 1:
+            self.stats["rule"] += 1
+            return matched.pop()
+        if not matched:
+            # a few dozen examples are not enough to recognize requests outside them; let triage decide
+            self.stats["fallback"] += 1
+            return None
+        label, similarity, margin = self.classify(text)
+        if label in matched and similarity >= self.min_similarity and margin >= self.min_margin:
+            self.stats["model"] += 1
+            return label
+        self.stats["fallback"] += 1
+        return None
+
+    def save(self, model):
+        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
+        tmp_path = f"{self.model_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(model, f)
+        os.replace(tmp_path, self.model_path)
+        with self._lock:
+            self._model = model
+
+    def _load(self):
+        try:
+            with open(self.model_path, encoding="utf-8") as f:
+                model = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if model.get("version") != MODEL_VERSION:
+            return None
+        return model
+
+
+triage_router = gtTriageRouter()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the local triage router from logged conversations.")
+    parser.add_argument("logs", nargs="*", help="JSONL files of {text, agent} examples or {messages} conversations")
+    parser.add_argument("--no-seed", action="store_true", help="do not include the built-in seed examples")
+    args = parser.parse_args()
+
+    examples = [] if args.no_seed else list(SEED_EXAMPLES)
+    for path in args.logs:
+        examples.extend(examples_from_conversations(path))
+    model = train_model(examples)
+    triage_router.save(model)
+    print(f"trained on {sum(model['examples'].values())} examples {model['examples']} -> {triage_router.model_path}")
@@ -0,0 +1,140 @@
+import json
+import threading
+
+MAX_MODEL_CALLS = 8
+MAX_HANDOFFS = 3
+FINAL_ANSWER_NOTE = (
+    "Tool and transfer budget for this question is used up. Answer the user now with the information "
+    "already in the conversation, and say briefly what could not be checked."
+)
+FALLBACK_ANSWER = "Sorry, I couldn't finish looking this up. Could you rephrase or narrow the question?"
+
+
+class gtLoopMetrics:
+    """
+    Process-wide counters of the model calls and handoffs the turn guards saved or refused.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.metrics = {
+            "turns": 0,
+            "model_calls": 0,
+            "handoffs": 0,
+            "duplicate_tool_calls": 0,
+            "handoff_cycles": 0,
+            "handoffs_over_budget": 0,
+            "forced_final_answers": 0,
+            "fallback_answers": 0,
+        }
+
+    def count(self, key, n=1):
+        with self._lock:
+            self.metrics[key] += n
+
+    def get_metrics(self):
+        with self._lock:
+            metrics = dict(self.metrics)
+        metrics["model_calls_per_turn"] = metrics["model_calls"] / metrics["turns"] if metrics["turns"] else 0.0
+        return metrics
+
+
+loop_metrics = gtLoopMetrics()
+
+
+def get_loop_metrics():
+    """
+    Returns counters of model calls, handoffs, repeated tool calls, transfer cycles and forced final answers.
+    """
+    return loop_metrics.get_metrics()
+
+
+TRANSFER_PREFIX = "transfer_to_"
+
+
+def _call_key(tool_call):
+    arguments = tool_call.function.arguments or "{}"
+    try:
+        arguments = json.dumps(json.loads(arguments), sort_keys=True)
+    except ValueError:
+        pass
+    return tool_call.function.name, arguments
+
+
+class gtTurnGuard:
+    """
+    Budget of one turn: at most max_model_calls model calls and max_handoffs handoffs. Identical tool calls
+    are not run twice, a transfer straight back to the agent that just handed over without any tool work
+    in between (A -> B -> A) is refused, and once the budget is used up or the turn is going in circles
+    the last call is made without tools.
+    """
+
+    def __init__(self, agent_name, max_model_calls=MAX_MODEL_CALLS, max_handoffs=MAX_HANDOFFS, metrics=loop_metrics):
+        self.max_model_calls = max_model_calls
+        self.max_handoffs = max_handoffs
+        self.metrics = metrics
+        self.model_calls = 0
+        self.handoffs = 0
+        self.chain = [agent_name]
+        self.force_final = False
+        self._seen_calls = set()
+        self._work_since_handoff = 0
+        metrics.count("turns")
+
+    def routed_to(self, agent_name):
+        """
+        Records a turn that the local router handed straight to agent_name.
+        """
+        self.chain.append(agent_name)
+
+    def record_model_call(self, final=False):
+        if final:
+            self.metrics.count("forced_final_answers")
+        self.model_calls += 1
+        self.metrics.count("model_calls")
+
+    def final_call(self):
+        """
+        True when the next model call must produce the answer (it is sent without tools).
+        """
+        return self.force_final or self.model_calls >= self.max_model_calls - 1
+
+    def duplicate_calls(self, tool_calls):
+        """
+        Returns the indexes of calls already made in this turn with the same arguments and remembers the others.
+        Transfers are left to allow_handoff.
+        """
+        duplicates = set()
+        for i, tool_call in enumerate(tool_calls):
+            if tool_call.function.name.startswith(TRANSFER_PREFIX):
+                continue
+            key = _call_key(tool_call)
+            if key in self._seen_calls:
+                duplicates.add(i)
+            else:
+                self._work_since_handoff += 1
+            self._seen_calls.add(key)
+        if duplicates:
+            self.metrics.count("duplicate_tool_calls", len(duplicates))
+            if len(duplicates) == len(tool_calls):
+                # nothing new was asked for: the model is repeating itself
+                self.force_final = True
+        return duplicates
+
+    def allow_handoff(self, from_name, to_name):
+        """
+        Returns None if control may move to to_name, otherwise the reason it may not.
+        """
+        if len(self.chain) >= 2 and self.chain[-2] == to_name and not self._work_since_handoff:
+            self.metrics.count("handoff_cycles")
+            self.force_final = True
+            return f"{to_name} just transferred to {from_name}; answer with the information you have instead of transferring back."
+        if self.handoffs >= self.max_handoffs:
+            self.metrics.count("handoffs_over_budget")
+            self.force_final = True
+            return f"the transfer limit for this question ({self.max_handoffs}) is reached; answer with the information you have."
+        self.handoffs += 1
+        self.chain.append(to_name)
+        self._work_since_handoff = 0
+        self.metrics.count("handoffs")
+        return None
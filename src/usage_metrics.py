@@ -0,0 +1,78 @@
+import threading
+from collections import deque
+
+RECENT_CALLS = 200
+
+
+def _usage_field(usage, *path):
+    value = usage
+    for key in path:
+        if value is None:
+            return 0
+        value = value.get(key) if isinstance(value, dict) else getattr(value, key, None)
+    return value or 0
+
+
+class gtUsageMetrics:
+    """
+    Token usage of model calls per agent, including the prompt tokens served from the provider's prompt cache.
+    """
+
+    def __init__(self, recent_calls=RECENT_CALLS):
+        self._lock = threading.Lock()
+        self._agents = {}
+        self._recent = deque(maxlen=recent_calls)
+
+    def record(self, agent_name, usage):
+        """
+        Records the usage block of one chat completion (a response or the last chunk of a stream)
+        and returns its token counts.
+        """
+        if usage is None:
+            return {}
+        call = {
+            "agent": agent_name,
+            "prompt_tokens": _usage_field(usage, "prompt_tokens"),
+            "cached_tokens": _usage_field(usage, "prompt_tokens_details", "cached_tokens"),
+            "completion_tokens": _usage_field(usage, "completion_tokens"),
+        }
+        with self._lock:
+            totals = self._agents.setdefault(
+                agent_name, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+            )
+            totals["calls"] += 1
+            for key in ("prompt_tokens", "cached_tokens", "completion_tokens"):
+                totals[key] += call[key]
+            self._recent.append(call)
+        return call
+
+    def get_metrics(self):
+        with self._lock:
+            agents = {name: dict(totals) for name, totals in self._agents.items()}
+            recent = list(self._recent)
+        for totals in agents.values():
+            totals["cache_hit_rate"] = totals["cached_tokens"] / totals["prompt_tokens"] if totals["prompt_tokens"] else 0.0
+        prompt = sum(t["prompt_tokens"] for t in agents.values())
+        cached = sum(t["cached_tokens"] for t in agents.values())
+        return {
+            "agents": agents,
+            "prompt_tokens": prompt,
+            "cached_tokens": cached,
+            "cache_hit_rate": cached / prompt if prompt else 0.0,
+            "recent_calls": recent,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._agents.clear()
+            self._recent.clear()
+
+
+usage_metrics = gtUsageMetrics()
+
+
+def get_usage_metrics():
+    """
+    Returns prompt, cached and completion token counters per agent and the overall prompt-cache hit rate.
+    """
+    return usage_metrics.get_metrics()
@@ -0,0 +1,18 @@
+import pytest
+
+from src import db_functions
+from src.set_db import bulk_load
+
+
+@pytest.fixture
+def university_db(tmp_path, monkeypatch):
+    """
+    A seeded university.db in a temporary directory, with the query pool and result cache pointed at it.
+    """
+    db_path = str(tmp_path / "university.db")
+    bulk_load(db_path)
+    pool = db_functions.gtConnectionPool(db_path)
+    monkeypatch.setattr(db_functions, "_pool", pool)
+    monkeypatch.setattr(db_functions, "_query_cache", db_functions.gtQueryCache())
+    yield db_path
+    pool.close_all()
@@ -0,0 +1,108 @@
+import sqlite3
+
+from src import db_functions
+from src.db_functions import fetch_rows, gtQueryCache, normalize_sql
+
+
+def test_normalize_sql_collapses_whitespace_and_case_outside_literals():
+    assert normalize_sql("  SELECT *\n  FROM   Students\tWHERE username = 'Lea07';;  ") == \
+        "select * from students where username = 'Lea07'"
+
+
+def test_normalize_sql_keeps_quoted_identifiers():
+    assert normalize_sql('SELECT "Full Name" FROM [My Table]') == 'select "Full Name" from [My Table]'
+
+
+def test_cache_key_skips_writes_and_nondeterministic_queries():
+    assert gtQueryCache.cache_key("SELECT 1") == "select 1"
+    assert gtQueryCache.cache_key("WITH t AS (SELECT 1) SELECT * FROM t") is not None
+    assert gtQueryCache.cache_key("UPDATE students SET gpa = 0") is None
+    assert gtQueryCache.cache_key("SELECT random()") is None
+    assert gtQueryCache.cache_key("SELECT date('now')") is None
+
+
+def test_equivalent_queries_share_a_cache_entry(university_db):
+    fetch_rows("SELECT gpa FROM students WHERE id = 1")
+    fetch_rows("select gpa\n  from STUDENTS where id = 1;")
+    stats = db_functions._query_cache.get_stats()
+    assert stats["cache_misses"] == 1
+    assert stats["cache_hits"] == 1
+
+
+def test_cache_is_invalidated_when_the_database_changes(university_db):
+    sql = "SELECT gpa FROM students WHERE id = 1"
+    assert fetch_rows(sql)["rows"] == [(4.0,)]
+
+    writer = sqlite3.connect(university_db)
+    with writer:
+        writer.execute("UPDATE students SET gpa = 3.5 WHERE id = 1")
+    writer.close()
+
+    assert fetch_rows(sql)["rows"] == [(3.5,)]
+    assert db_functions._query_cache.get_stats()["cache_invalidations"] == 1
+
+
+def test_data_version_change_invalidates_without_a_file_change(university_db, monkeypatch):
+    cache = gtQueryCache()
+    conn = db_functions._pool.connection()
+
+    # with the files' size and mtime hidden, only PRAGMA data_version can tell that another connection committed
+    def no_stat(path):
+        raise OSError(path)
+
+    monkeypatch.setattr(db_functions.os, "stat", no_stat)
+    generation = cache.validate(conn, university_db)
+    cache.put("key", {"rows": []}, generation)
+    assert cache.validate(conn, university_db) == generation
+
+    writer = sqlite3.connect(university_db)
+    with writer:
+        writer.execute("UPDATE students SET gpa = 3.5 WHERE id = 1")
+    writer.close()
+
+    assert cache.validate(conn, university_db) > generation
+    assert cache.get("key") is None
+
+
+def test_result_computed_before_a_change_is_not_cached(university_db):
+    cache = gtQueryCache()
+    conn = db_functions._pool.connection()
+    generation = cache.validate(conn, university_db)
+    cache.clear()
+    cache.put("key", {"rows": []}, generation)
+    assert cache.get("key") is None
+
+
+def test_fetch_rows_pages_by_offset(university_db):
+    sql = "SELECT id FROM professors ORDER BY id"
+    first = fetch_rows(sql, offset=0, limit=5)
+    assert [row[0] for row in first["rows"]] == [1, 2, 3, 4, 5]
+    assert first["has_more"] is True
+
+    last = fetch_rows(sql, offset=15, limit=5)
+    assert [row[0] for row in last["rows"]] == [16]
+    assert last["has_more"] is False
+
+    assert fetch_rows(sql, offset=100, limit=5) == {"columns": ["id"], "rows": [], "has_more": False}
+
+
+def test_query_university_db_footer_gives_the_next_cursor(university_db):
+    page = db_functions.query_university_db("SELECT id, username FROM professors ORDER BY id", max_rows=10)
+    assert page.startswith("id,username\n1,mahdir\n")
+    assert page.endswith("[rows 1-10 shown, more rows available: call again with cursor=10]")
+
+    rest = db_functions.query_university_db("SELECT id, username FROM professors ORDER BY id", cursor=10, max_rows=10)
+    assert rest.splitlines()[1] == "11,chernova"
+    assert rest.endswith("[rows 11-16 shown, end of results]")
+
+
+def test_render_rows_stops_at_max_chars():
+    rows = [(i, "x" * 40) for i in range(100)]
+    text = db_functions.render_rows(["id", "text"], rows, max_chars=500)
+    assert len(text) < 600
+    assert "more rows available: call again with cursor=" in text
+
+
+def test_query_errors_are_returned_not_raised(university_db):
+    assert "error" in db_functions.query_university_db("SELECT * FROM no_such_table")
+    assert "error" in db_functions.query_university_db("DELETE FROM students")
@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+from src.history import SUMMARY_PREFIX, estimate_tokens, gtHistoryManager, message_field, split_turns
+
+
+def turn(i, result_chars=100):
+    return [
+        {"role": "user", "content": f"question {i}"},
+        {"role": "assistant", "content": None, "tool_calls": [
+            {"id": f"call_{i}", "type": "function", "function": {"name": "query_university_db", "arguments": "{}"}},
+        ]},
+        {"role": "tool", "tool_call_id": f"call_{i}", "content": "r" * result_chars},
+        {"role": "assistant", "content": f"answer {i}"},
+    ]
+
+
+def history(turns, result_chars=100):
+    return [m for i in range(turns) for m in turn(i, result_chars)]
+
+
+def test_message_field_reads_dicts_and_objects():
+    assert message_field({"role": "user"}, "role") == "user"
+    assert message_field(SimpleNamespace(role="assistant"), "role") == "assistant"
+    assert message_field({}, "content", "") == ""
+
+
+def test_split_turns_keeps_tool_results_with_their_turn():
+    turns = split_turns(history(3))
+    assert len(turns) == 3
+    assert [m["role"] for m in turns[0]] == ["user", "assistant", "tool", "assistant"]
+
+
+def test_history_under_budget_is_unchanged():
+    messages = history(3)
+    assert gtHistoryManager(token_budget=100000).compact(messages) == messages
+
+
+def test_old_tool_results_are_truncated_and_recent_ones_kept():
+    manager = gtHistoryManager(token_budget=100000, keep_recent_turns=2, tool_result_chars=50)
+    compacted = manager.compact(history(4, result_chars=500))
+    tool_results = [m["content"] for m in compacted if m["role"] == "tool"]
+    assert tool_results[0] == "r" * 50 + "...[truncated 450 chars]"
+    assert tool_results[2:] == ["r" * 500, "r" * 500]
+
+
+def test_oldest_turns_are_summarized_when_over_budget():
+    manager = gtHistoryManager(token_budget=300, keep_recent_turns=2)
+    compacted = manager.compact(history(10, result_chars=400))
+    assert compacted[0]["role"] == "system"
+    assert compacted[0]["content"].startswith(SUMMARY_PREFIX)
+    assert '- user: "question 0" -> assistant: "answer 0"' in compacted[0]["content"]
+    assert compacted[-1] == {"role": "assistant", "content": "answer 9"}
+    assert compacted[1]["role"] == "user"
+
+
+def test_compacting_twice_changes_nothing():
+    for budget in (300, 2000, 100000):
+        manager = gtHistoryManager(token_budget=budget, keep_recent_turns=2, tool_result_chars=50)
+        once = manager.compact(history(10, result_chars=500))
+        assert manager.compact(once) == once
+
+
+def test_repeated_compaction_keeps_earlier_summaries():
+    manager = gtHistoryManager(token_budget=300, keep_recent_turns=2)
+    messages = history(4, result_chars=400)
+    for i in range(4, 10):
+        messages = manager.compact(messages + turn(i, result_chars=400))
+    summary = messages[0]["content"]
+    assert '"question 0"' in summary and '"question 7"' in summary
+    assert sum(1 for m in messages if m["role"] == "system") == 1
+
+
+def test_history_never_starts_with_orphaned_tool_results():
+    messages = history(3)[2:]
+    compacted = gtHistoryManager(token_budget=100000).compact(messages)
+    assert compacted[0]["role"] != "tool"
+
+
+def test_estimate_tokens_counts_tool_call_arguments():
+    message = turn(0)[1]
+    assert estimate_tokens(message) > estimate_tokens({"role": "assistant", "content": None})
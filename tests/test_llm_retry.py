@@ -0,0 +1,119 @@
+import time
+
+import openai
+import pytest
+
+from src.deadline import DeadlineExceeded, gtDeadline
+from src.llm_retry import gtRetryPolicy
+from src.mock_client import MockOpenAIServer, script_responder
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+@pytest.fixture
+def server():
+    with MockOpenAIServer(script_responder([{"content": "hello"}] * 20)) as server:
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    return openai.AzureOpenAI(api_key="test", api_version="2024-12-01-preview", azure_endpoint=server.url, max_retries=0)
+
+
+def create(client):
+    return lambda **kwargs: client.chat.completions.create(model="test", messages=MESSAGES, **kwargs)
+
+
+def test_rate_limit_waits_as_long_as_retry_after_asks(server, client):
+    policy = gtRetryPolicy(call_timeout=2.0, base_delay=0.01)
+    server.add_fault(429, retry_after=0.3)
+    start = time.perf_counter()
+    response, attempts = policy.call(create(client))
+    assert time.perf_counter() - start >= 0.3
+    assert response.choices[0].message.content == "hello"
+    assert attempts == 2
+    metrics = policy.get_metrics()
+    assert metrics["rate_limited"] == 1
+    assert metrics["retry_wait_s"] == pytest.approx(0.3)
+
+
+def test_server_errors_and_timeouts_are_retried(server, client):
+    policy = gtRetryPolicy(call_timeout=0.3, base_delay=0.01)
+    server.add_fault(503)
+    server.add_fault(delay=1.0)
+    response, attempts = policy.call(create(client))
+    assert response.choices[0].message.content == "hello"
+    assert attempts == 3
+    metrics = policy.get_metrics()
+    assert metrics["server_errors"] == 1
+    assert metrics["timeouts"] == 1
+
+
+def test_client_errors_are_not_retried(server, client):
+    policy = gtRetryPolicy(call_timeout=2.0, base_delay=0.01)
+    server.add_fault(400)
+    with pytest.raises(openai.BadRequestError):
+        policy.call(create(client))
+    assert server.requests == 1
+    assert policy.get_metrics()["failures"] == 1
+
+
+def test_last_error_is_raised_when_retries_run_out(server, client):
+    policy = gtRetryPolicy(call_timeout=2.0, max_retries=2, base_delay=0.01)
+    for _ in range(3):
+        server.add_fault(500)
+    with pytest.raises(openai.InternalServerError):
+        policy.call(create(client))
+    assert server.requests == 3
+
+
+def test_retry_after_past_the_deadline_gives_up_at_once(server, client):
+    policy = gtRetryPolicy(call_timeout=2.0, base_delay=0.01)
+    server.add_fault(429, retry_after=5)
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        policy.call(create(client), gtDeadline(1.0))
+    assert time.perf_counter() - start < 1.0
+    assert policy.get_metrics()["deadline_hits"] == 1
+
+
+def test_call_timeout_is_capped_by_the_deadline(server, client):
+    policy = gtRetryPolicy(call_timeout=10.0, max_retries=0)
+    server.add_fault(delay=2.0)
+    start = time.perf_counter()
+    with pytest.raises(openai.APITimeoutError):
+        policy.call(create(client), gtDeadline(0.3))
+    assert time.perf_counter() - start < 1.5
+
+
+@pytest.fixture
+def agent_app(server, client, monkeypatch):
+    import app
+
+    monkeypatch.setattr(app, "client", client)
+    monkeypatch.setattr(app, "retry_policy", gtRetryPolicy(call_timeout=2.0, base_delay=0.01))
+    monkeypatch.setattr(app, "TRIAGE_ROUTER_ENABLED", False)
+    return app
+
+
+def test_turn_survives_a_throttled_model(server, agent_app):
+    server.add_fault(429, retry_after=0.1)
+    server.add_fault(503)
+    response = agent_app.run_full_turn(agent_app.triage_agent, MESSAGES)
+    assert response.messages == [{"role": "assistant", "content": "hello"}]
+    assert agent_app.retry_policy.get_metrics()["retries"] == 2
+
+
+def test_streamed_turn_survives_a_throttled_model(server, agent_app):
+    server.add_fault(429, retry_after=0.1)
+    events = list(agent_app.run_full_turn_stream(agent_app.triage_agent, MESSAGES))
+    assert "".join(e["delta"] for e in events if e["type"] == "text") == "hello"
+    assert events[-1]["response"].messages == [{"role": "assistant", "content": "hello"}]
+
+
+def test_turn_past_its_deadline_answers_with_an_apology(server, agent_app, monkeypatch):
+    monkeypatch.setattr(agent_app, "TURN_DEADLINE_SECONDS", 0.5)
+    server.add_fault(429, retry_after=2)
+    response = agent_app.run_full_turn(agent_app.triage_agent, MESSAGES)
+    assert response.messages == [{"role": "assistant", "content": agent_app.DEADLINE_REPLY}]
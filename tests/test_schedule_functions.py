@@ -0,0 +1,66 @@
+import pytest
+
+from src.schedule_functions import check_schedule_conflicts, fetch_rows_in, find_conflicts, parse_schedule
+
+
+@pytest.mark.parametrize("schedule, expected", [
+    ("Mon/Wed 12:30 - 13:45", [(0, 750, 825), (2, 750, 825)]),
+    ("TR 2:00pm-3:15pm", [(1, 840, 915), (3, 840, 915)]),
+    ("MWF 9-9:50am", [(0, 540, 590), (2, 540, 590), (4, 540, 590)]),
+    ("Mon 11-1pm", [(0, 660, 780)]),
+    ("Mon 11-12pm", [(0, 660, 720)]),
+    ("Tue 12:30 - 1:45", [(1, 750, 825)]),
+    ("Mon/Wed 12:30 - 13:45, Fri 09:00 - 09:50", [(0, 750, 825), (2, 750, 825), (4, 540, 590)]),
+    ("Thursday 6pm - 8:45pm", [(3, 1080, 1245)]),
+])
+def test_parse_schedule(schedule, expected):
+    assert parse_schedule(schedule) == expected
+
+
+@pytest.mark.parametrize("schedule", [None, "", "TBA", "Online", "12:30 - 13:45"])
+def test_parse_schedule_without_days_or_times(schedule):
+    assert parse_schedule(schedule) == []
+
+
+def test_find_conflicts_reports_each_overlapping_pair():
+    meetings = [
+        (1, 0, 600, 675),   # Mon 10:00-11:15
+        (2, 0, 660, 720),   # Mon 11:00-12:00, overlaps 1
+        (3, 0, 675, 700),   # Mon 11:15-11:40, starts as 1 ends, overlaps 2
+        (4, 1, 600, 675),   # Tue, same time as 1 on another day
+    ]
+    assert find_conflicts(meetings) == {
+        (1, 2): [(0, 660, 675)],
+        (2, 3): [(0, 675, 700)],
+    }
+
+
+def test_find_conflicts_ignores_meetings_of_the_same_offering():
+    assert find_conflicts([(7, 0, 600, 700), (7, 0, 650, 750)]) == {}
+
+
+def test_find_conflicts_orders_pairs_and_lists_every_day():
+    meetings = [(9, 0, 600, 700), (5, 0, 650, 750), (9, 2, 600, 700), (5, 2, 650, 750)]
+    assert find_conflicts(meetings) == {(5, 9): [(0, 650, 700), (2, 650, 700)]}
+
+
+def test_check_schedule_conflicts(university_db):
+    result = check_schedule_conflicts([11, 12, 13, 14, 999])
+    assert result["conflicts"] == [{
+        "offering_ids": [12, 14],
+        "courses": ["CS7633", "CS7650"],
+        "overlaps": ["Mon 14:00-15:15", "Wed 14:00-15:15"],
+    }]
+    assert result["no_conflicts"] is False
+    assert result["not_found"] == [999]
+
+
+def test_check_schedule_conflicts_accepts_ids_as_text(university_db):
+    assert check_schedule_conflicts("11, 13")["no_conflicts"] is True
+    assert "error" in check_schedule_conflicts([])
+
+
+def test_fetch_rows_in_chunks_long_id_lists(university_db, monkeypatch):
+    monkeypatch.setattr("src.schedule_functions.IN_CHUNK_SIZE", 3)
+    rows = fetch_rows_in("SELECT offering_id FROM course_offerings WHERE offering_id IN ({ids})", list(range(1, 18)) * 2)
+    assert sorted(row[0] for row in rows) == list(range(1, 18))
@@ -0,0 +1,86 @@
+import json
+from types import SimpleNamespace
+
+from src.turn_guard import gtLoopMetrics, gtTurnGuard
+
+
+def call(name, **arguments):
+    return SimpleNamespace(function=SimpleNamespace(name=name, arguments=json.dumps(arguments)))
+
+
+def guard(**kwargs):
+    return gtTurnGuard("Triage Agent", metrics=gtLoopMetrics(), **kwargs)
+
+
+def test_repeated_call_with_the_same_arguments_is_a_duplicate():
+    g = guard()
+    assert g.duplicate_calls([call("query_university_db", sql_query="SELECT 1")]) == set()
+    # argument order does not matter
+    calls = [
+        SimpleNamespace(function=SimpleNamespace(name="recommend_course_bundles", arguments='{"b": 1, "a": 2}')),
+        call("query_university_db", sql_query="SELECT 1"),
+    ]
+    assert g.duplicate_calls(calls) == {1}
+    assert g.duplicate_calls([call("recommend_course_bundles", a=2, b=1)]) == {0}
+    assert g.metrics.get_metrics()["duplicate_tool_calls"] == 2
+
+
+def test_only_duplicates_force_the_final_answer():
+    g = guard()
+    g.duplicate_calls([call("query_university_db", sql_query="SELECT 1")])
+    g.duplicate_calls([call("query_university_db", sql_query="SELECT 1"), call("query_university_db", sql_query="SELECT 2")])
+    assert not g.final_call()
+    g.duplicate_calls([call("query_university_db", sql_query="SELECT 2")])
+    assert g.final_call()
+
+
+def test_transfers_are_not_duplicates():
+    g = guard()
+    assert g.duplicate_calls([call("transfer_to_db_agent")]) == set()
+    assert g.duplicate_calls([call("transfer_to_db_agent")]) == set()
+
+
+def test_transfer_straight_back_is_refused():
+    g = guard()
+    assert g.allow_handoff("Triage Agent", "Database Agent") is None
+    reason = g.allow_handoff("Database Agent", "Triage Agent")
+    assert "just transferred" in reason
+    assert g.final_call()
+    assert g.chain == ["Triage Agent", "Database Agent"]
+    assert g.metrics.get_metrics()["handoff_cycles"] == 1
+
+
+def test_transfer_back_after_tool_work_is_allowed():
+    g = guard()
+    g.allow_handoff("Triage Agent", "Database Agent")
+    g.duplicate_calls([call("query_university_db", sql_query="SELECT 1")])
+    assert g.allow_handoff("Database Agent", "Triage Agent") is None
+    assert not g.final_call()
+
+
+def test_routed_turn_counts_as_the_first_transfer():
+    g = guard()
+    g.routed_to("Program Agent")
+    assert g.allow_handoff("Program Agent", "Triage Agent") is not None
+
+
+def test_handoff_budget():
+    g = guard(max_handoffs=2)
+    assert g.allow_handoff("Triage Agent", "Database Agent") is None
+    assert g.allow_handoff("Database Agent", "Program Agent") is None
+    assert "transfer limit" in g.allow_handoff("Program Agent", "Calendar Agent")
+    assert g.handoffs == 2
+    assert g.final_call()
+
+
+def test_last_model_call_is_the_final_one():
+    g = guard(max_model_calls=3)
+    assert not g.final_call()
+    g.record_model_call()
+    assert not g.final_call()
+    g.record_model_call()
+    assert g.final_call()
+    g.record_model_call(final=True)
+    metrics = g.metrics.get_metrics()
+    assert metrics["model_calls"] == 3
+    assert metrics["forced_final_answers"] == 1